@@ -7,6 +7,9 @@ like sessions, memory, streaming, guardrails, etc.
 This module integrates with app.core.base for standardized component patterns.
 """
 import logging
+import itertools
+import os
+import uuid
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List, Type
 from enum import Enum
@@ -20,6 +23,15 @@ from ..core.base import (
 
 logger = logging.getLogger(__name__)
 
+# Per-process prefix (pid + random salt) so ids stay unique across workers and restarts
+_LOCAL_ID_PREFIX = f"{os.getpid():x}{uuid.uuid4().hex[:8]}-"
+_local_id_counter = itertools.count(1)
+
+
+def next_local_id() -> str:
+    """Cheap process-unique id for high-rate, in-process records (not for secrets or session ids)."""
+    return f"{_LOCAL_ID_PREFIX}{next(_local_id_counter):x}"
+
 
 class CapabilityStatus(str, Enum):
     """Status of a capability."""
@@ -69,15 +81,11 @@ class Capability(ABC, LifecycleMixin, ValidationMixin, ObservabilityMixin):
     def __init__(self, config: Optional[CapabilityConfig] = None):
         self.config = config or CapabilityConfig()
         self._cap_status = CapabilityStatus.DISABLED
-        self._initialized_at: Optional[datetime] = None
-        self._shutdown_at: Optional[datetime] = None
-        self._error: Optional[str] = None
-        self._error_count: int = 0
         
         # Initialize mixins
-        self._validation_errors = []
-        self._validation_warnings = []
-        self._metrics = {}
+        self._init_lifecycle()
+        self._init_validation()
+        self._init_observability()
     
     @property
     def status(self) -> CapabilityStatus:
@@ -103,6 +111,7 @@ class Capability(ABC, LifecycleMixin, ValidationMixin, ObservabilityMixin):
             await self._do_initialize()
             self._cap_status = CapabilityStatus.ENABLED
             self._initialized_at = datetime.utcnow()
+            self._initialized_at_iso = self._initialized_at.isoformat()
             self.increment_counter("initializations")
             logger.info(f"Capability '{self.name}' initialized successfully")
             return True
@@ -124,6 +133,7 @@ class Capability(ABC, LifecycleMixin, ValidationMixin, ObservabilityMixin):
             await self._do_shutdown()
             self._cap_status = CapabilityStatus.DISABLED
             self._shutdown_at = datetime.utcnow()
+            self._shutdown_at_iso = self._shutdown_at.isoformat()
             logger.info(f"Capability '{self.name}' shut down")
         except Exception as e:
             self._error = str(e)
@@ -149,8 +159,8 @@ class Capability(ABC, LifecycleMixin, ValidationMixin, ObservabilityMixin):
             "component_type": self.component_type.value,
             "status": self._cap_status.value,
             "enabled": self.config.enabled,
-            "initialized_at": self._initialized_at.isoformat() if self._initialized_at else None,
-            "shutdown_at": self._shutdown_at.isoformat() if self._shutdown_at else None,
+            "initialized_at": self._initialized_at_iso,
+            "shutdown_at": self._shutdown_at_iso,
             "error": self._error,
             "error_count": self._error_count
         }
@@ -4,20 +4,53 @@ Evaluation Framework capability.
 Provides automated evaluation, test suites, regression testing,
 and quality metrics for agents.
 """
+import hashlib
 import logging
+import os
+import re
+import time
 import uuid
 import asyncio
+import bisect
 import json
-from typing import Optional, Dict, Any, List, Callable, Awaitable
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Literal
 from datetime import datetime
 from enum import Enum
+import httpx
 from pydantic import BaseModel, Field
 
 from .base import Capability, CapabilityConfig
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _canonical_json(obj: Any, default: Optional[Callable[[Any], Any]] = str) -> bytes:
+    """Serialize to canonical (key-sorted) JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=default
+        )
+    return json.dumps(obj, sort_keys=True, default=default).encode()
+
+
+@dataclass(slots=True)
+class _AgentOutputCache:
+    """Agent output futures shared by identical inputs within one eval run."""
+    futures: Dict[str, asyncio.Future] = field(default_factory=dict)
+    # Test case ID -> input key, recorded as each test runs
+    keys: Dict[str, str] = field(default_factory=dict)
+
+
 class EvalMetricType(str, Enum):
     """Types of evaluation metrics."""
     ACCURACY = "accuracy"
@@ -41,7 +74,7 @@ class EvalStatus(str, Enum):
 
 class TestCase(BaseModel):
     """A test case for evaluation."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str = ""
     
@@ -65,33 +98,34 @@ class TestCase(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
-class TestResult(BaseModel):
-    """Result of a single test case."""
+@dataclass(slots=True)
+class TestResult:
+    """Result of a single test case (slotted dataclass, built once per test run)."""
     test_case_id: str
     test_case_name: str
     passed: bool
-    score: float = Field(ge=0.0, le=1.0)
+    score: float
     
     # Outputs
     actual_output: str = ""
     
     # Metrics
-    metrics: Dict[str, float] = Field(default_factory=dict)
+    metrics: Dict[str, float] = field(default_factory=dict)
     
     # Timing
     latency_ms: float = 0.0
     tokens_used: int = 0
     
     # Details
-    details: Dict[str, Any] = Field(default_factory=dict)
+    details: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
     
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
 
 
 class EvalResult(BaseModel):
     """Result of a full evaluation run."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     status: EvalStatus = EvalStatus.PENDING
     
@@ -136,7 +170,7 @@ class EvalResult(BaseModel):
 
 class TestSuite(BaseModel):
     """A collection of test cases."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     name: str
     description: str = ""
     
@@ -146,6 +180,10 @@ class TestSuite(BaseModel):
     parallel: bool = Field(default=False, description="Run tests in parallel")
     stop_on_failure: bool = Field(default=False)
     timeout_seconds: int = Field(default=300)
+    dedupe_inputs: bool = Field(
+        default=False,
+        description="Invoke the agent once per unique input (only for deterministic agents)"
+    )
     
     # Tags
     tags: List[str] = Field(default_factory=list)
@@ -168,11 +206,34 @@ class EvalConfig(CapabilityConfig):
     # LLM-as-judge
     judge_enabled: bool = Field(default=False, description="Use LLM as judge")
     judge_model: Optional[str] = Field(default=None)
-    judge_endpoint: Optional[str] = Field(default=None)
+    judge_endpoint: Optional[str] = Field(
+        default=None,
+        description="OpenAI-compatible base URL for the judge (defaults to the OpenAI API)"
+    )
+    judge_api_key: Optional[str] = Field(
+        default=None,
+        description="Judge API key (resolved from ${VARIABLE} references)"
+    )
+    judge_in_score: bool = Field(
+        default=False,
+        description="Count the judge metric towards the pass/fail score"
+    )
     
     # Storage
     store_results: bool = Field(default=True)
     max_stored_results: int = Field(default=1000)
+    storage_backend: Literal["memory", "sqlite"] = Field(
+        default="memory",
+        description="Result storage: memory, sqlite"
+    )
+    storage_path: str = Field(
+        default="./data/evaluation.db",
+        description="SQLite database path for the sqlite backend"
+    )
+    cache_size: int = Field(
+        default=32,
+        description="Recently used results kept in memory with the sqlite backend"
+    )
     
     # Defaults
     default_timeout: int = Field(default=60)
@@ -186,18 +247,59 @@ class EvalFramework(Capability):
     version = "1.0.0"
     description = "Automated testing and evaluation framework"
     
+    # Simple keyword-based safety check, matched in a single pass; the lookahead
+    # tries every position, so overlapping keywords ("killegal") each count
+    _UNSAFE_RE = re.compile(
+        r"(?=(kill|harm|illegal|dangerous|hate|discriminate))",
+        re.IGNORECASE
+    )
+    # First number in a judge reply, e.g. "0.8" or "Score: 0.75"
+    _JUDGE_SCORE_RE = re.compile(r"\d+(?:\.\d+)?|\.\d+")
+    
     def __init__(self, config: Optional[EvalConfig] = None):
         super().__init__(config or EvalConfig())
         self.config: EvalConfig = self.config
         
         self._test_suites: Dict[str, TestSuite] = {}
         self._eval_results: Dict[str, EvalResult] = {}
+        # Stored results kept sorted by completion time (oldest first)
+        self._results_by_completion: List[EvalResult] = []
         self._custom_metrics: Dict[str, Callable] = {}
         self._agent_executor: Optional[Callable] = None
+        
+        # SQLite backend: results live on disk, recent ones cached in memory
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = asyncio.Lock()
+        self._result_cache: "OrderedDict[str, EvalResult]" = OrderedDict()
+        
+        # Shared keep-alive client for LLM-as-judge calls
+        self._judge_client: Optional[httpx.AsyncClient] = None
+        
+        # Built-in metrics scored per test case (latency is measured separately)
+        self._metric_types = tuple(
+            m for m in self.config.default_metrics if m != EvalMetricType.LATENCY
+        )
     
     async def _do_initialize(self):
         """Initialize evaluation framework."""
-        logger.info(f"Evaluation framework initialized (judge={self.config.judge_enabled})")
+        if self.config.storage_backend == "sqlite" and self._db is None:
+            self._db = await asyncio.to_thread(self._open_db, self.config.storage_path)
+        if self.config.judge_enabled and self.config.judge_model and self._judge_client is None:
+            self._judge_client = self._create_judge_client()
+        logger.info(
+            f"Evaluation framework initialized (judge={self.config.judge_enabled}, "
+            f"storage={self.config.storage_backend})"
+        )
+    
+    async def _do_shutdown(self):
+        """Close the judge client and results database."""
+        if self._judge_client is not None:
+            await self._judge_client.aclose()
+            self._judge_client = None
+        if self._db is not None:
+            await self._db_call(self._db.close)
+            self._db = None
+        self._result_cache.clear()
     
     def set_agent_executor(self, executor: Callable[[str, Dict[str, Any]], Awaitable[str]]):
         """Set the function to execute agent calls."""
@@ -259,23 +361,34 @@ class EvalFramework(Capability):
         if not suite:
             raise ValueError(f"Test suite {suite_id} not found")
         
-        result = EvalResult(
+        # Internally built from trusted values, so skip validation
+        result = EvalResult.model_construct(
             name=f"Eval: {suite.name}",
             agent_id=agent_id,
             agent_version=agent_version,
             status=EvalStatus.RUNNING,
             started_at=datetime.utcnow(),
-            metadata=metadata or {}
+            metadata=dict(metadata) if metadata else {}
         )
+        start_ns = time.perf_counter_ns()
+        # Agent outputs keyed by input hash, shared by identical test cases
+        output_cache = _AgentOutputCache() if suite.dedupe_inputs else None
         
         try:
             if suite.parallel:
-                test_results = await self._run_parallel(suite)
+                test_results = await self._run_parallel(suite, output_cache)
             else:
-                test_results = await self._run_sequential(suite)
+                test_results = await self._run_sequential(suite, output_cache)
             
             result.test_results = test_results
             result.calculate_aggregates()
+            if output_cache is not None and test_results:
+                # Only tests that produced a result count; cancelled ones may have cached inputs
+                keys = output_cache.keys
+                unique_inputs = {
+                    keys.get(r.test_case_id, r.test_case_id) for r in test_results
+                }
+                result.metadata["dedup_hit_rate"] = 1 - len(unique_inputs) / len(test_results)
             result.status = EvalStatus.COMPLETED
             
         except Exception as e:
@@ -284,40 +397,115 @@ class EvalFramework(Capability):
             logger.error(f"Evaluation failed: {e}")
         
         result.completed_at = datetime.utcnow()
-        if result.started_at:
-            result.duration_seconds = (result.completed_at - result.started_at).total_seconds()
+        result.duration_seconds = (time.perf_counter_ns() - start_ns) / 1e9
         
         # Store result
         if self.config.store_results:
-            self._eval_results[result.id] = result
+            if self._db is not None:
+                await self._db_call(self._persist_result, result)
+                self._cache_result(result)
+            else:
+                self._eval_results[result.id] = result
+                bisect.insort(self._results_by_completion, result, key=self._completion_key)
             await self._enforce_storage_limit()
         
         return result
     
-    async def _run_sequential(self, suite: TestSuite) -> List[TestResult]:
+    async def _run_sequential(
+        self,
+        suite: TestSuite,
+        output_cache: Optional[_AgentOutputCache]
+    ) -> List[TestResult]:
         """Run tests sequentially."""
         results = []
         for test_case in suite.test_cases:
-            result = await self._run_test_case(test_case, suite.timeout_seconds)
+            result = await self._run_test_case(test_case, suite.timeout_seconds, output_cache)
             results.append(result)
             if suite.stop_on_failure and not result.passed:
                 break
         return results
     
-    async def _run_parallel(self, suite: TestSuite) -> List[TestResult]:
+    async def _run_parallel(
+        self,
+        suite: TestSuite,
+        output_cache: Optional[_AgentOutputCache]
+    ) -> List[TestResult]:
         """Run tests in parallel."""
         semaphore = asyncio.Semaphore(self.config.max_concurrent_tests)
         
-        async def run_with_semaphore(test_case: TestCase) -> TestResult:
+        async def run_with_semaphore(index: int, test_case: TestCase):
             async with semaphore:
-                return await self._run_test_case(test_case, suite.timeout_seconds)
-        
-        tasks = [run_with_semaphore(tc) for tc in suite.test_cases]
-        return await asyncio.gather(*tasks)
+                return index, await self._run_test_case(
+                    test_case, suite.timeout_seconds, output_cache
+                )
+
+        tasks = [
+            asyncio.ensure_future(run_with_semaphore(i, tc))
+            for i, tc in enumerate(suite.test_cases)
+        ]
+        completed: Dict[int, TestResult] = {}
+
+        # Collect results as they finish so stop_on_failure can cancel the rest
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                completed[index] = result
+                if suite.stop_on_failure and not result.passed:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled tests finish unwinding before the run returns
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Preserve suite order for the tests that ran
+        return [completed[i] for i in sorted(completed)]
+    
+    @staticmethod
+    def _input_key(test_case: TestCase) -> Optional[str]:
+        """Content hash of the agent input, or None if the context isn't plain JSON data."""
+        try:
+            # No str() fallback: distinct objects with equal str() must not share an output
+            canonical = _canonical_json([test_case.input_prompt, test_case.input_context], default=None)
+        except TypeError:
+            return None
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+    
+    async def _call_agent(self, test_case: TestCase, timeout: int) -> str:
+        """Invoke the agent for a test case."""
+        if self._agent_executor:
+            return await asyncio.wait_for(
+                self._agent_executor(test_case.input_prompt, test_case.input_context),
+                timeout=timeout
+            )
+        return f"[Mock output for: {test_case.input_prompt[:50]}...]"
+    
+    async def _execute_agent(
+        self,
+        test_case: TestCase,
+        timeout: int,
+        output_cache: _AgentOutputCache
+    ) -> str:
+        """Get the agent output, invoking the agent once per unique input."""
+        key = self._input_key(test_case)
+        if key is None:
+            return await self._call_agent(test_case, timeout)
+        output_cache.keys[test_case.id] = key
+        future = output_cache.futures.get(key)
+        if future is None:
+            future = output_cache.futures[key] = asyncio.ensure_future(
+                self._call_agent(test_case, timeout)
+            )
+        return await future
     
-    async def _run_test_case(self, test_case: TestCase, timeout: int) -> TestResult:
+    async def _run_test_case(
+        self,
+        test_case: TestCase,
+        timeout: int,
+        output_cache: Optional[_AgentOutputCache] = None
+    ) -> TestResult:
         """Run a single test case."""
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         result = TestResult(
             test_case_id=test_case.id,
@@ -327,14 +515,11 @@ class EvalFramework(Capability):
         )
         
         try:
-            # Execute agent
-            if self._agent_executor:
-                actual_output = await asyncio.wait_for(
-                    self._agent_executor(test_case.input_prompt, test_case.input_context),
-                    timeout=timeout
-                )
+            # Execute agent (deduplicated across identical inputs when the suite opts in)
+            if output_cache is None:
+                actual_output = await self._call_agent(test_case, timeout)
             else:
-                actual_output = f"[Mock output for: {test_case.input_prompt[:50]}...]"
+                actual_output = await self._execute_agent(test_case, timeout, output_cache)
             
             result.actual_output = actual_output
             
@@ -352,21 +537,29 @@ class EvalFramework(Capability):
             result.error = str(e)
         
         # Calculate latency
-        result.latency_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
+        result.latency_ms = (time.perf_counter_ns() - start_ns) / 1e6
         
         return result
     
     async def _calculate_metrics(self, test_case: TestCase, output: str) -> Dict[str, float]:
         """Calculate evaluation metrics."""
         metrics = {}
+        # Lowercased once and shared by every built-in metric
+        output_lower = output.lower()
         
-        for metric_type in self.config.default_metrics:
-            if metric_type == EvalMetricType.LATENCY:
-                continue  # Handled separately
-            
-            metric_value = await self._calculate_metric(metric_type, test_case, output)
+        for metric_type in self._metric_types:
+            metric_value = await self._calculate_metric(
+                metric_type, test_case, output, output_lower
+            )
             metrics[metric_type.value] = metric_value
         
+        # LLM-as-judge
+        if self._judge_client is not None:
+            try:
+                metrics["judge"] = await self._judge_score(test_case, output)
+            except Exception as e:
+                logger.warning(f"Judge metric failed: {e}")
+        
         # Custom metrics
         for name, metric_fn in self._custom_metrics.items():
             try:
@@ -380,13 +573,14 @@ class EvalFramework(Capability):
         self, 
         metric_type: EvalMetricType, 
         test_case: TestCase, 
-        output: str
+        output: str,
+        output_lower: Optional[str] = None
     ) -> float:
         """Calculate a single metric."""
         if metric_type == EvalMetricType.RELEVANCE:
-            return self._relevance_score(test_case, output)
+            return self._relevance_score(test_case, output, output_lower)
         elif metric_type == EvalMetricType.COHERENCE:
-            return self._coherence_score(output)
+            return self._coherence_score(output, output_lower)
         elif metric_type == EvalMetricType.FLUENCY:
             return self._fluency_score(output)
         elif metric_type == EvalMetricType.SAFETY:
@@ -394,10 +588,59 @@ class EvalFramework(Capability):
         else:
             return 0.5  # Default neutral score
     
-    def _relevance_score(self, test_case: TestCase, output: str) -> float:
+    def _create_judge_client(self) -> httpx.AsyncClient:
+        """Create the pooled client for the judge's OpenAI-compatible API."""
+        headers = {"Content-Type": "application/json"}
+        api_key = os.path.expandvars(self.config.judge_api_key) if self.config.judge_api_key else None
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        
+        # One connection per concurrent test plus headroom, kept alive across calls
+        pool_size = 2 * self.config.max_concurrent_tests
+        return httpx.AsyncClient(
+            base_url=self.config.judge_endpoint or "https://api.openai.com/v1",
+            headers=headers,
+            timeout=self.config.default_timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+    
+    async def _judge_score(self, test_case: TestCase, output: str) -> float:
+        """Score an output with the judge model."""
+        criteria = test_case.grading_criteria or "Is the response correct, relevant and helpful?"
+        prompt = (
+            f"Grade the response against the criteria. Reply with only a number "
+            f"between 0 and 1.\n\nCriteria: {criteria}\n\nPrompt: {test_case.input_prompt}\n\n"
+        )
+        if test_case.expected_output:
+            prompt += f"Expected output: {test_case.expected_output}\n\n"
+        prompt += f"Response: {output}"
+        
+        response = await self._judge_client.post("/chat/completions", json={
+            "model": self.config.judge_model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.0,
+            "max_tokens": 16,
+        })
+        response.raise_for_status()
+        content = response.json()["choices"][0]["message"].get("content") or ""
+        match = self._JUDGE_SCORE_RE.search(content)
+        if match is None:
+            raise ValueError(f"Judge reply has no score: {content[:100]!r}")
+        score = float(match.group())
+        if not 0.0 <= score <= 1.0:
+            raise ValueError(f"Judge score out of range: {score}")
+        return score
+    
+    def _relevance_score(
+        self,
+        test_case: TestCase,
+        output: str,
+        output_lower: Optional[str] = None
+    ) -> float:
         """Calculate relevance score."""
         score = 0.5
-        output_lower = output.lower()
+        if output_lower is None:
+            output_lower = output.lower()
         
         # Check expected contains
         if test_case.expected_contains:
@@ -420,7 +663,7 @@ class EvalFramework(Capability):
         
         return min(1.0, max(0.0, score))
     
-    def _coherence_score(self, output: str) -> float:
+    def _coherence_score(self, output: str, output_lower: Optional[str] = None) -> float:
         """Calculate coherence score based on structure."""
         if not output.strip():
             return 0.0
@@ -438,7 +681,9 @@ class EvalFramework(Capability):
             score += 0.1
         
         # Not too repetitive
-        words = output.lower().split()
+        if output_lower is None:
+            output_lower = output.lower()
+        words = output_lower.split()
         if words:
             unique_ratio = len(set(words)) / len(words)
             score += unique_ratio * 0.2
@@ -466,14 +711,8 @@ class EvalFramework(Capability):
     
     def _safety_score(self, output: str) -> float:
         """Calculate safety score."""
-        # Simple keyword-based safety check
-        unsafe_patterns = [
-            'kill', 'harm', 'illegal', 'dangerous',
-            'hate', 'discriminate'
-        ]
-        
-        output_lower = output.lower()
-        violations = sum(1 for p in unsafe_patterns if p in output_lower)
+        # Count distinct unsafe keywords present
+        violations = len({m.group(1).lower() for m in self._UNSAFE_RE.finditer(output)})
         
         if violations == 0:
             return 1.0
@@ -492,25 +731,191 @@ class EvalFramework(Capability):
         if not metrics:
             return 0.5
         
-        # Simple average of all metrics
+        # Simple average of all metrics; the judge only counts when opted in
+        if "judge" in metrics and not self.config.judge_in_score:
+            metrics = {k: v for k, v in metrics.items() if k != "judge"}
+            if not metrics:
+                return 0.5
         return sum(metrics.values()) / len(metrics)
     
     async def _enforce_storage_limit(self):
         """Enforce storage limit for results."""
+        if self._db is not None:
+            evicted = await self._db_call(self._delete_oldest, self.config.max_stored_results)
+            for result_id in evicted:
+                self._result_cache.pop(result_id, None)
+            return
+        
         if len(self._eval_results) > self.config.max_stored_results:
             # Remove oldest results
-            sorted_results = sorted(
-                self._eval_results.items(),
-                key=lambda x: x[1].completed_at or datetime.min
-            )
             to_remove = len(self._eval_results) - self.config.max_stored_results
-            for rid, _ in sorted_results[:to_remove]:
-                del self._eval_results[rid]
+            for old in self._results_by_completion[:to_remove]:
+                del self._eval_results[old.id]
+            del self._results_by_completion[:to_remove]
+    
+    @staticmethod
+    def _completion_key(result: EvalResult) -> datetime:
+        return result.completed_at or datetime.min
+    
+    # SQLite storage
+    async def _db_call(self, fn: Callable, *args) -> Any:
+        """Run a blocking database call in a worker thread, one at a time."""
+        async with self._db_lock:
+            return await asyncio.to_thread(fn, *args)
+    
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        """Open the results database and create its schema."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Used from worker threads, serialized by _db_lock
+        db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA foreign_keys=ON")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS eval_results (
+                id TEXT PRIMARY KEY,
+                agent_id TEXT,
+                completed_at TEXT NOT NULL,
+                total_tests INTEGER NOT NULL,
+                pass_rate REAL NOT NULL,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_eval_results_completed
+                ON eval_results (completed_at);
+            CREATE INDEX IF NOT EXISTS idx_eval_results_agent
+                ON eval_results (agent_id, completed_at);
+            CREATE TABLE IF NOT EXISTS eval_test_results (
+                eval_id TEXT NOT NULL REFERENCES eval_results (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (eval_id, position)
+            );
+        """)
+        return db
+    
+    def _persist_result(self, result: EvalResult):
+        """Write a result and its test results in a single transaction."""
+        data = result.model_dump(mode="json")
+        test_rows = [
+            (result.id, position, _canonical_json(test_result))
+            for position, test_result in enumerate(data.pop("test_results"))
+        ]
+        
+        self._db.execute("BEGIN")
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO eval_results "
+                "(id, agent_id, completed_at, total_tests, pass_rate, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    result.id,
+                    result.agent_id,
+                    data["completed_at"] or "",
+                    result.total_tests,
+                    result.pass_rate,
+                    _canonical_json(data)
+                )
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO eval_test_results (eval_id, position, data) "
+                "VALUES (?, ?, ?)",
+                test_rows
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+    
+    def _delete_oldest(self, keep: int) -> List[str]:
+        """Delete all but the newest ``keep`` results and return the evicted ids."""
+        # Select then delete in one transaction (DELETE ... RETURNING needs SQLite 3.35+)
+        self._db.execute("BEGIN")
+        try:
+            evicted = [
+                row[0] for row in self._db.execute(
+                    "SELECT id FROM eval_results ORDER BY completed_at DESC LIMIT -1 OFFSET ?",
+                    (keep,)
+                ).fetchall()
+            ]
+            if evicted:
+                self._db.executemany(
+                    "DELETE FROM eval_results WHERE id = ?", [(result_id,) for result_id in evicted]
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return evicted
+    
+    def _load_results(self, where: str = "", params: tuple = (), limit: int = -1) -> List[EvalResult]:
+        """Hydrate results (newest first) and their test results with a single query."""
+        rows = self._db.execute(
+            "SELECT e.id, e.data, t.data FROM ("
+            f"SELECT id, data, completed_at FROM eval_results {where} "
+            "ORDER BY completed_at DESC LIMIT ?) AS e "
+            "LEFT JOIN eval_test_results AS t ON t.eval_id = e.id "
+            "ORDER BY e.completed_at DESC, e.id, t.position",
+            (*params, limit)
+        ).fetchall()
+        
+        results: List[EvalResult] = []
+        current_id = None
+        data: Dict[str, Any] = {}
+        for result_id, result_data, test_data in rows:
+            if result_id != current_id:
+                if current_id is not None:
+                    results.append(EvalResult.model_validate(data))
+                current_id = result_id
+                data = json.loads(result_data)
+                data["test_results"] = []
+            if test_data is not None:
+                data["test_results"].append(json.loads(test_data))
+        if current_id is not None:
+            results.append(EvalResult.model_validate(data))
+        return results
+    
+    def _load_result(self, result_id: str) -> Optional[EvalResult]:
+        """Hydrate a result from the database."""
+        results = self._load_results("WHERE id = ?", (result_id,), 1)
+        return results[0] if results else None
+    
+    def _query_stats(self) -> tuple:
+        """Aggregate stored result counts in the database."""
+        return self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(total_tests), 0), COALESCE(AVG(pass_rate), 0) "
+            "FROM eval_results"
+        ).fetchone()
+    
+    def _cache_result(self, result: EvalResult):
+        """Add a result to the in-memory LRU cache."""
+        self._result_cache[result.id] = result
+        self._result_cache.move_to_end(result.id)
+        while len(self._result_cache) > self.config.cache_size:
+            self._result_cache.popitem(last=False)
+    
+    async def _get_result(self, result_id: str) -> Optional[EvalResult]:
+        """Look up a stored result in whichever backend is active."""
+        if self._db is None:
+            return self._eval_results.get(result_id)
+        
+        result = self._result_cache.get(result_id)
+        if result is not None:
+            self._result_cache.move_to_end(result_id)
+            return result
+        
+        result = await self._db_call(self._load_result, result_id)
+        if result is not None:
+            self._cache_result(result)
+        return result
     
     # Results Management
     async def get_eval_result(self, result_id: str) -> Optional[EvalResult]:
         """Get an evaluation result."""
-        return self._eval_results.get(result_id)
+        return await self._get_result(result_id)
     
     async def list_eval_results(
         self,
@@ -518,13 +923,28 @@ class EvalFramework(Capability):
         limit: int = 100
     ) -> List[EvalResult]:
         """List evaluation results."""
-        results = list(self._eval_results.values())
-        
-        if agent_id:
-            results = [r for r in results if r.agent_id == agent_id]
+        results = []
+        if limit <= 0:
+            return results
+        
+        if self._db is not None:
+            # Loaded as one page, bypassing the LRU so a listing doesn't evict hot results
+            if agent_id:
+                loaded = await self._db_call(
+                    self._load_results, "WHERE agent_id = ?", (agent_id,), limit
+                )
+            else:
+                loaded = await self._db_call(self._load_results, "", (), limit)
+            return [self._result_cache.get(r.id, r) for r in loaded]
         
-        results.sort(key=lambda r: r.completed_at or datetime.min, reverse=True)
-        return results[:limit]
+        # Walk the completion index newest-first and stop once limit is reached
+        for result in reversed(self._results_by_completion):
+            if agent_id and result.agent_id != agent_id:
+                continue
+            results.append(result)
+            if len(results) >= limit:
+                break
+        return results
     
     async def compare_results(
         self,
@@ -532,8 +952,8 @@ class EvalFramework(Capability):
         result_id_2: str
     ) -> Dict[str, Any]:
         """Compare two evaluation results."""
-        r1 = self._eval_results.get(result_id_1)
-        r2 = self._eval_results.get(result_id_2)
+        r1 = await self._get_result(result_id_1)
+        r2 = await self._get_result(result_id_2)
         
         if not r1 or not r2:
             return {"error": "One or both results not found"}
@@ -550,12 +970,17 @@ class EvalFramework(Capability):
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get evaluation statistics."""
-        total_evals = len(self._eval_results)
-        total_tests = sum(r.total_tests for r in self._eval_results.values())
-        avg_pass_rate = (
-            sum(r.pass_rate for r in self._eval_results.values()) / total_evals
-            if total_evals else 0
-        )
+        if self._db is not None:
+            total_evals, total_tests, avg_pass_rate = await self._db_call(
+                self._query_stats
+            )
+        else:
+            total_evals = len(self._eval_results)
+            total_tests = sum(r.total_tests for r in self._eval_results.values())
+            avg_pass_rate = (
+                sum(r.pass_rate for r in self._eval_results.values()) / total_evals
+                if total_evals else 0
+            )
         
         return {
             "total_evaluations": total_evals,
@@ -4,16 +4,36 @@ Guardrails capability.
 Provides content filtering, PII detection, input/output validation,
 and safety checks for agent interactions.
 """
+import asyncio
 import logging
 import re
-import hashlib
-from typing import Optional, Dict, Any, List, Set, Callable, Awaitable
+import secrets
+from collections import Counter, deque
+from functools import partial
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Set, Callable, Awaitable, Iterable, Tuple, Deque
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import Field
 
 from .base import Capability, CapabilityConfig
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,16 +73,17 @@ class PIIType(str, Enum):
     CUSTOM = "custom"
 
 
-class GuardrailViolation(BaseModel):
+@dataclass(slots=True)
+class GuardrailViolation:
     """A guardrail violation."""
-    id: str = Field(default_factory=lambda: hashlib.md5(str(datetime.utcnow().timestamp()).encode()).hexdigest()[:12])
     guardrail_name: str
     guardrail_type: GuardrailType
     severity: GuardrailSeverity
     action_taken: GuardrailAction
     message: str
-    details: Dict[str, Any] = Field(default_factory=dict)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    id: str = field(default_factory=lambda: secrets.token_hex(6))
+    details: Dict[str, Any] = field(default_factory=dict)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
     
     # Position in content
     start_pos: Optional[int] = None
@@ -70,11 +91,12 @@ class GuardrailViolation(BaseModel):
     matched_text: Optional[str] = None
 
 
-class GuardrailResult(BaseModel):
+@dataclass(slots=True)
+class GuardrailResult:
     """Result of guardrail check."""
-    passed: bool = True
     content: str  # Original or modified content
-    violations: List[GuardrailViolation] = Field(default_factory=list)
+    passed: bool = True
+    violations: List[GuardrailViolation] = field(default_factory=list)
     blocked: bool = False
     modified: bool = False
     
@@ -87,7 +109,8 @@ class GuardrailResult(BaseModel):
             self.modified = True
 
 
-class GuardrailRule(BaseModel):
+@dataclass(slots=True)
+class GuardrailRule:
     """A guardrail rule definition."""
     name: str
     description: str = ""
@@ -97,8 +120,8 @@ class GuardrailRule(BaseModel):
     action: GuardrailAction = GuardrailAction.BLOCK
     
     # Pattern matching
-    patterns: List[str] = Field(default_factory=list)
-    keywords: List[str] = Field(default_factory=list)
+    patterns: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
     
     # Custom check function name
     custom_check: Optional[str] = None
@@ -127,10 +150,132 @@ class GuardrailConfig(CapabilityConfig):
     
     # Custom rules
     custom_rules: List[GuardrailRule] = Field(default_factory=list)
+    parallel_rails: bool = Field(
+        default=True,
+        description="Run custom rule checks (registered async check functions) concurrently"
+    )
     
     # Audit
     log_violations: bool = Field(default=True)
     store_violations: bool = Field(default=True)
+    max_stored_violations: int = Field(
+        default=10000, ge=1,
+        description="Oldest stored violations are evicted beyond this (use store_violations to disable)"
+    )
+
+
+class KeywordMatcher:
+    """
+    Finds which keywords occur in lowercased content.
+    
+    Uses an Aho-Corasick automaton (pyahocorasick) to scan for all keywords
+    in a single pass when available, falling back to substring checks.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        # Lowercased keyword -> original keywords (in configuration order)
+        self._keywords: Dict[str, List[str]] = {}
+        for keyword in keywords:
+            if keyword:
+                self._keywords.setdefault(keyword.lower(), []).append(keyword)
+        
+        self._automaton = None
+        if ahocorasick is not None and self._keywords:
+            self._automaton = ahocorasick.Automaton()
+            for key in self._keywords:
+                self._automaton.add_word(key, key)
+            self._automaton.make_automaton()
+    
+    def __bool__(self) -> bool:
+        return bool(self._keywords)
+    
+    def find(self, content_lower: str) -> List[Tuple[str, int, int]]:
+        """Return (keyword, start, end) for the first occurrence of each matched keyword."""
+        first_hits: Dict[str, int] = {}
+        if self._automaton is not None:
+            for end, key in self._automaton.iter(content_lower):
+                if key not in first_hits:
+                    first_hits[key] = end - len(key) + 1
+        else:
+            for key in self._keywords:
+                start = content_lower.find(key)
+                if start >= 0:
+                    first_hits[key] = start
+        
+        return [
+            (keyword, start, start + len(key))
+            for key, start in first_hits.items()
+            for keyword in self._keywords[key]
+        ]
+
+
+class PatternSet:
+    """
+    Finds which of a set of case-insensitive regex patterns occur in content.
+    
+    Each pattern has an owner (None for blocked patterns, the rule's index in
+    ``custom_rules`` for custom rule patterns). Compiles all patterns into one Hyperscan database
+    and matches them in a single pass when available, so only the patterns it
+    reports are run through Python ``re`` for match positions. Without
+    Hyperscan (or when it rejects a pattern, e.g. back references) each
+    pattern is matched with ``re`` once.
+    """
+    
+    def __init__(self, patterns: Iterable[Tuple[Optional[int], str]]):
+        self._compiled: List[Tuple[Optional[int], str, re.Pattern]] = []
+        for owner, pattern in patterns:
+            try:
+                self._compiled.append((owner, pattern, re.compile(pattern, re.IGNORECASE)))
+            except re.error as e:
+                logger.warning(f"Invalid pattern {pattern}: {e}")
+        
+        self._database = None
+        if hyperscan is not None and self._compiled:
+            flags = (
+                hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+                | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+            )
+            database = hyperscan.Database()
+            try:
+                database.compile(
+                    expressions=[pattern.encode() for _, pattern, _ in self._compiled],
+                    ids=list(range(len(self._compiled))),
+                    elements=len(self._compiled),
+                    flags=[flags] * len(self._compiled),
+                )
+                self._database = database
+            except hyperscan.error as e:
+                logger.debug(f"Hyperscan cannot compile guardrail patterns, using re: {e}")
+    
+    def __bool__(self) -> bool:
+        return bool(self._compiled)
+    
+    def matched(self, content: str) -> List[Tuple[Optional[int], str, List[re.Match]]]:
+        """
+        Return (owner, pattern, matches) for patterns found in content, in configuration order.
+        
+        Rule patterns get every match (violations carry positions); blocked
+        patterns only need the first.
+        """
+        candidates = self._compiled
+        if self._database is not None:
+            hits: Set[int] = set()
+            self._database.scan(
+                content.encode(),
+                match_event_handler=lambda pattern_id, start, end, flags, context: hits.add(pattern_id),
+            )
+            candidates = [self._compiled[i] for i in sorted(hits)]
+        
+        found = []
+        for owner, pattern, compiled in candidates:
+            if owner is None:
+                match = compiled.search(content)
+                matches = [match] if match else []
+            else:
+                matches = list(compiled.finditer(content))
+            if matches:
+                found.append((owner, pattern, matches))
+        return found
 
 
 class GuardrailsManager(Capability):
@@ -140,25 +285,96 @@ class GuardrailsManager(Capability):
     version = "1.0.0"
     description = "Content filtering, PII detection, and safety checks"
     
-    # PII Regex patterns
+    # PII Regex patterns (compiled once, case-insensitive)
     PII_PATTERNS = {
-        PIIType.EMAIL: r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-        PIIType.PHONE: r'\b(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}\b',
-        PIIType.SSN: r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b',
-        PIIType.CREDIT_CARD: r'\b(?:\d{4}[-\s]?){3}\d{4}\b|\b\d{16}\b',
-        PIIType.IP_ADDRESS: r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
+        PIIType.EMAIL: re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', re.IGNORECASE),
+        PIIType.PHONE: re.compile(r'\b(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}\b', re.IGNORECASE),
+        PIIType.SSN: re.compile(r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b', re.IGNORECASE),
+        PIIType.CREDIT_CARD: re.compile(r'\b(?:\d{4}[-\s]?){3}\d{4}\b|\b\d{16}\b', re.IGNORECASE),
+        PIIType.IP_ADDRESS: re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b', re.IGNORECASE),
     }
     
     def __init__(self, config: Optional[GuardrailConfig] = None):
         super().__init__(config or GuardrailConfig())
         self.config: GuardrailConfig = self.config
-        self._violations: List[GuardrailViolation] = []
+        self._violations: Deque[GuardrailViolation] = deque(maxlen=self.config.max_stored_violations)
+        # Running counts over stored violations for get_stats
+        self._severity_counts: Counter = Counter()
+        self._type_counts: Counter = Counter()
         self._custom_checks: Dict[str, Callable[[str], Awaitable[List[GuardrailViolation]]]] = {}
+        
+        # Per check type: blocked patterns and the applicable enabled rules' patterns,
+        # matched together in one scan, and those rules as (index in custom_rules, rule)
+        self._pattern_sets: Dict[GuardrailType, PatternSet] = {}
+        self._active_rules: Dict[GuardrailType, List[Tuple[int, GuardrailRule]]] = {}
+        self._blocked_keywords = KeywordMatcher(())
+        # Enabled PII patterns combined into one regex with a named group per type
+        # (RE2 when available for linear-time matching)
+        self._pii_union = None
+        # Keyword matchers of enabled rules, by index in custom_rules
+        self._rule_keywords: Dict[int, KeywordMatcher] = {}
+        self._compile_patterns()
     
     async def _do_initialize(self):
         """Initialize guardrails."""
+        self._compile_patterns()
         logger.info(f"Guardrails initialized (PII={self.config.pii_detection_enabled})")
     
+    def _compile_patterns(self):
+        """Compile configured PII, blocked and custom rule patterns."""
+        pii_groups = []
+        for pii_type in dict.fromkeys(self.config.pii_types):
+            pattern = self.PII_PATTERNS.get(pii_type)
+            if pattern is not None:
+                pii_groups.append(f"(?P<{pii_type.value}>{pattern.pattern})")
+        self._pii_union = self._compile_pii("|".join(pii_groups)) if pii_groups else None
+        
+        self._blocked_keywords = KeywordMatcher(self.config.blocked_keywords)
+        self._build_rules()
+    
+    @staticmethod
+    def _compile_pii(pattern: str):
+        """Compile the combined PII pattern with RE2, falling back to re."""
+        if re2 is not None:
+            options = re2.Options()
+            options.case_sensitive = False
+            try:
+                return re2.compile(pattern, options)
+            except re2.error as e:
+                logger.debug(f"RE2 cannot compile PII patterns, using re: {e}")
+        return re.compile(pattern, re.IGNORECASE)
+    
+    def _build_rules(self):
+        """
+        Compile enabled custom rules, and one pattern set per check type.
+        
+        Called on initialize and by add_rule/update_rule/remove_rule; edits made
+        to ``config.custom_rules`` directly take effect on the next of these.
+        """
+        blocked = [(None, pattern) for pattern in self.config.blocked_patterns]
+        enabled = [(i, rule) for i, rule in enumerate(self.config.custom_rules) if rule.enabled]
+        self._rule_keywords = {i: KeywordMatcher(rule.keywords) for i, rule in enabled}
+        for check_type in (GuardrailType.INPUT, GuardrailType.OUTPUT):
+            rules = [
+                (i, rule) for i, rule in enabled
+                if rule.guardrail_type in (check_type, GuardrailType.BOTH)
+            ]
+            self._active_rules[check_type] = rules
+            self._pattern_sets[check_type] = PatternSet(
+                blocked + [(i, pattern) for i, rule in rules for pattern in rule.patterns]
+            )
+    
+    def _scan(
+        self,
+        content: str,
+        check_type: GuardrailType
+    ) -> Dict[Optional[int], List[Tuple[str, List[re.Match]]]]:
+        """Scan content once for blocked and applicable rule patterns, grouped by owner."""
+        hits: Dict[Optional[int], List[Tuple[str, List[re.Match]]]] = {}
+        for owner, pattern, matches in self._pattern_sets[check_type].matched(content):
+            hits.setdefault(owner, []).append((pattern, matches))
+        return hits
+    
     def register_custom_check(
         self, 
         name: str, 
@@ -192,145 +408,205 @@ class GuardrailsManager(Capability):
                 v.guardrail_type = check_type
                 result.add_violation(v)
         
-        # Content filtering (blocked keywords)
-        if self.config.content_filtering_enabled:
-            keyword_violations = await self._check_keywords(modified_content, check_type)
-            for v in keyword_violations:
-                result.add_violation(v)
-                if v.action_taken == GuardrailAction.BLOCK:
-                    result.content = modified_content
-                    return result
+        # Blocked and rule patterns are matched in a single scan of the masked content
+        pattern_hits = self._scan(modified_content, check_type)
         
-        # Pattern matching
-        pattern_violations = await self._check_patterns(modified_content, check_type)
-        for v in pattern_violations:
-            result.add_violation(v)
-            if v.action_taken == GuardrailAction.BLOCK:
-                result.content = modified_content
-                return result
+        # Remaining checks only read the (masked) content; keyword checks share one
+        # lowercased copy. Each entry is (check, awaits I/O)
+        content_lower = modified_content.lower()
+        checks = []
+        if self.config.content_filtering_enabled:
+            checks.append((partial(self._check_keywords, modified_content, check_type, content_lower), False))
+        checks.append((partial(
+            self._check_patterns, modified_content, check_type,
+            [pattern for pattern, _ in pattern_hits.get(None, ())]
+        ), False))
+        for index, rule in self._active_rules[check_type]:
+            checks.append((partial(
+                self._check_rule, modified_content, rule, pattern_hits.get(index, []),
+                content_lower, self._rule_keywords[index]
+            ), rule.custom_check in self._custom_checks))
         
-        # Custom rules
-        for rule in self.config.custom_rules:
-            if not rule.enabled:
-                continue
-            if rule.guardrail_type not in [check_type, GuardrailType.BOTH]:
-                continue
-            
-            rule_violations = await self._check_rule(modified_content, rule)
-            for v in rule_violations:
-                result.add_violation(v)
-                if v.action_taken == GuardrailAction.BLOCK:
-                    result.content = modified_content
-                    return result
+        # Only rails that call a registered check function can overlap; the CPU-bound
+        # ones run inline rather than paying for a Task each
+        tasks = {}
+        if self.config.parallel_rails:
+            tasks = {i: asyncio.ensure_future(check()) for i, (check, io) in enumerate(checks) if io}
+        try:
+            # Violations are applied in check order; stop at the first block
+            for i, (check, _) in enumerate(checks):
+                task = tasks.get(i)
+                violations = await (task if task is not None else check())
+                for v in violations:
+                    result.add_violation(v)
+                    if v.action_taken == GuardrailAction.BLOCK:
+                        result.content = modified_content
+                        return result
+        finally:
+            if tasks:
+                for task in tasks.values():
+                    task.cancel()
+                # Retrieve every outcome so finished or cancelled checks don't log unretrieved errors
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
         
         result.content = modified_content
         
         # Store violations
         if self.config.store_violations and result.violations:
-            self._violations.extend(result.violations)
+            self._store_violations(result.violations)
         
         return result
     
+    def _store_violations(self, violations: List[GuardrailViolation]):
+        """Store violations, keeping the running counts in step with evictions."""
+        for v in violations:
+            if len(self._violations) == self._violations.maxlen:
+                evicted = self._violations[0]
+                self._decrement(self._severity_counts, evicted.severity.value)
+                self._decrement(self._type_counts, evicted.guardrail_name)
+            self._violations.append(v)
+            self._severity_counts[v.severity.value] += 1
+            self._type_counts[v.guardrail_name] += 1
+    
+    @staticmethod
+    def _decrement(counts: Counter, key: str):
+        """Decrement a count, dropping keys that reach zero."""
+        counts[key] -= 1
+        if counts[key] <= 0:
+            del counts[key]
+    
     async def _check_pii(self, content: str) -> tuple:
         """Check for PII and optionally mask it."""
         violations = []
-        modified = content
+        if self._pii_union is None:
+            return content, violations
         
-        for pii_type in self.config.pii_types:
-            pattern = self.PII_PATTERNS.get(pii_type)
-            if not pattern:
-                continue
-            
-            for match in re.finditer(pattern, modified, re.IGNORECASE):
-                violation = GuardrailViolation(
-                    guardrail_name=f"pii_{pii_type.value}",
-                    guardrail_type=GuardrailType.BOTH,
-                    severity=GuardrailSeverity.HIGH,
-                    action_taken=self.config.pii_action,
-                    message=f"Detected {pii_type.value}",
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    matched_text=match.group() if self.config.pii_action != GuardrailAction.BLOCK else "[hidden]",
-                    details={"pii_type": pii_type.value}
-                )
-                violations.append(violation)
-                
-                if self.config.pii_action == GuardrailAction.MASK:
-                    replacement = f"[{pii_type.value.upper()}_REDACTED]"
-                    modified = modified[:match.start()] + replacement + modified[match.end():]
+        mask = self.config.pii_action == GuardrailAction.MASK
+        hide = self.config.pii_action == GuardrailAction.BLOCK
+        now = datetime.utcnow()
+        
+        # Record violations and mask in the same pass; the group names the PII type
+        def record(match: re.Match) -> str:
+            pii_type = match.lastgroup
+            violations.append(GuardrailViolation(
+                guardrail_name=f"pii_{pii_type}",
+                guardrail_type=GuardrailType.BOTH,
+                severity=GuardrailSeverity.HIGH,
+                action_taken=self.config.pii_action,
+                message=f"Detected {pii_type}",
+                start_pos=match.start(),
+                end_pos=match.end(),
+                matched_text="[hidden]" if hide else match.group(),
+                details={"pii_type": pii_type},
+                timestamp=now
+            ))
+            return f"[{pii_type.upper()}_REDACTED]" if mask else match.group()
+        
+        modified = self._pii_union.sub(record, content)
+        if not mask:
+            modified = content
         
         return modified, violations
     
-    async def _check_keywords(self, content: str, check_type: GuardrailType) -> List[GuardrailViolation]:
+    async def _check_keywords(
+        self,
+        content: str,
+        check_type: GuardrailType,
+        content_lower: Optional[str] = None
+    ) -> List[GuardrailViolation]:
         """Check for blocked keywords."""
         violations = []
-        content_lower = content.lower()
+        if not self._blocked_keywords:
+            return violations
         
-        for keyword in self.config.blocked_keywords:
-            if keyword.lower() in content_lower:
-                violations.append(GuardrailViolation(
-                    guardrail_name="blocked_keyword",
-                    guardrail_type=check_type,
-                    severity=GuardrailSeverity.HIGH,
-                    action_taken=GuardrailAction.BLOCK,
-                    message=f"Blocked keyword detected",
-                    details={"keyword": keyword}
-                ))
+        if content_lower is None:
+            content_lower = content.lower()
+        for keyword, start, end in self._blocked_keywords.find(content_lower):
+            violations.append(GuardrailViolation(
+                guardrail_name="blocked_keyword",
+                guardrail_type=check_type,
+                severity=GuardrailSeverity.HIGH,
+                action_taken=GuardrailAction.BLOCK,
+                message=f"Blocked keyword detected",
+                details={"keyword": keyword},
+                start_pos=start,
+                end_pos=end
+            ))
         
         return violations
     
-    async def _check_patterns(self, content: str, check_type: GuardrailType) -> List[GuardrailViolation]:
-        """Check against blocked patterns."""
+    async def _check_patterns(
+        self,
+        content: str,
+        check_type: GuardrailType,
+        matched: Optional[List[str]] = None
+    ) -> List[GuardrailViolation]:
+        """Check against blocked patterns (``matched`` is the result of a prior scan)."""
         violations = []
+        if matched is None:
+            matched = [pattern for pattern, _ in self._scan(content, check_type).get(None, ())]
         
-        for pattern in self.config.blocked_patterns:
-            try:
-                if re.search(pattern, content, re.IGNORECASE):
-                    violations.append(GuardrailViolation(
-                        guardrail_name="blocked_pattern",
-                        guardrail_type=check_type,
-                        severity=GuardrailSeverity.HIGH,
-                        action_taken=GuardrailAction.BLOCK,
-                        message="Blocked pattern detected",
-                        details={"pattern": pattern}
-                    ))
-            except re.error as e:
-                logger.warning(f"Invalid pattern {pattern}: {e}")
+        for pattern in matched:
+            violations.append(GuardrailViolation(
+                guardrail_name="blocked_pattern",
+                guardrail_type=check_type,
+                severity=GuardrailSeverity.HIGH,
+                action_taken=GuardrailAction.BLOCK,
+                message="Blocked pattern detected",
+                details={"pattern": pattern}
+            ))
         
         return violations
     
-    async def _check_rule(self, content: str, rule: GuardrailRule) -> List[GuardrailViolation]:
-        """Check content against a custom rule."""
+    async def _check_rule(
+        self,
+        content: str,
+        rule: GuardrailRule,
+        matched: Optional[List[Tuple[str, List[re.Match]]]] = None,
+        content_lower: Optional[str] = None,
+        keyword_matcher: Optional[KeywordMatcher] = None
+    ) -> List[GuardrailViolation]:
+        """Check content against a custom rule (``matched`` is the rule's share of a prior scan)."""
         violations = []
+        now = datetime.utcnow()
         
         # Check patterns
-        for pattern in rule.patterns:
-            try:
-                for match in re.finditer(pattern, content, re.IGNORECASE):
-                    violations.append(GuardrailViolation(
-                        guardrail_name=rule.name,
-                        guardrail_type=rule.guardrail_type,
-                        severity=rule.severity,
-                        action_taken=rule.action,
-                        message=rule.description or f"Rule '{rule.name}' violated",
-                        start_pos=match.start(),
-                        end_pos=match.end(),
-                        matched_text=match.group()
-                    ))
-            except re.error:
-                pass
+        if matched is None:
+            matched = [
+                (pattern, matches) for _, pattern, matches
+                in PatternSet((0, pattern) for pattern in rule.patterns).matched(content)
+            ]
+        for _, matches in matched:
+            for match in matches:
+                violations.append(GuardrailViolation(
+                    guardrail_name=rule.name,
+                    guardrail_type=rule.guardrail_type,
+                    severity=rule.severity,
+                    action_taken=rule.action,
+                    message=rule.description or f"Rule '{rule.name}' violated",
+                    start_pos=match.start(),
+                    end_pos=match.end(),
+                    matched_text=match.group(),
+                    timestamp=now
+                ))
         
         # Check keywords
-        content_lower = content.lower()
-        for keyword in rule.keywords:
-            if keyword.lower() in content_lower:
+        if keyword_matcher is None:
+            keyword_matcher = KeywordMatcher(rule.keywords)
+        if keyword_matcher:
+            if content_lower is None:
+                content_lower = content.lower()
+            for keyword, start, end in keyword_matcher.find(content_lower):
                 violations.append(GuardrailViolation(
                     guardrail_name=rule.name,
                     guardrail_type=rule.guardrail_type,
                     severity=rule.severity,
                     action_taken=rule.action,
                     message=rule.description or f"Rule '{rule.name}' violated",
-                    details={"keyword": keyword}
+                    details={"keyword": keyword},
+                    start_pos=start,
+                    end_pos=end,
+                    timestamp=now
                 ))
         
         # Custom check
@@ -346,40 +622,50 @@ class GuardrailsManager(Capability):
         severity: Optional[GuardrailSeverity] = None
     ) -> List[GuardrailViolation]:
         """Get stored violations."""
-        violations = self._violations
+        violations = reversed(self._violations)
         if severity:
-            violations = [v for v in violations if v.severity == severity]
-        return violations[-limit:]
+            violations = (v for v in violations if v.severity == severity)
+        recent = list(islice(violations, limit))
+        recent.reverse()
+        return recent
     
     async def clear_violations(self):
         """Clear stored violations."""
         self._violations.clear()
+        self._severity_counts.clear()
+        self._type_counts.clear()
     
     async def add_rule(self, rule: GuardrailRule):
         """Add a custom rule."""
         self.config.custom_rules.append(rule)
+        self._build_rules()
+    
+    async def update_rule(self, rule_name: str, updates: Dict[str, Any]) -> bool:
+        """Update fields of a custom rule (e.g. patterns, keywords, enabled)."""
+        for rule in self.config.custom_rules:
+            if rule.name == rule_name:
+                for key, value in updates.items():
+                    if hasattr(rule, key):
+                        setattr(rule, key, value)
+                self._build_rules()
+                return True
+        return False
     
     async def remove_rule(self, rule_name: str) -> bool:
         """Remove a custom rule."""
         for i, rule in enumerate(self.config.custom_rules):
             if rule.name == rule_name:
                 del self.config.custom_rules[i]
+                self._build_rules()
                 return True
         return False
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get guardrail statistics."""
-        by_severity = {}
-        by_type = {}
-        
-        for v in self._violations:
-            by_severity[v.severity.value] = by_severity.get(v.severity.value, 0) + 1
-            by_type[v.guardrail_name] = by_type.get(v.guardrail_name, 0) + 1
-        
         return {
             "total_violations": len(self._violations),
-            "by_severity": by_severity,
-            "by_type": by_type,
+            "by_severity": dict(self._severity_counts),
+            "by_type": dict(self._type_counts),
             "pii_detection_enabled": self.config.pii_detection_enabled,
             "custom_rules_count": len(self.config.custom_rules)
         }
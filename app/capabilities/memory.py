@@ -4,13 +4,16 @@ Memory Management capability.
 Provides short-term, long-term, and shared memory for agents with
 semantic retrieval capabilities.
 """
+import heapq
 import logging
 import uuid
 import hashlib
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import Field
 
 from .base import Capability, CapabilityConfig
 
@@ -33,12 +36,13 @@ class MemoryType(str, Enum):
     WORKING = "working"         # Current task working memory
 
 
-class MemoryEntry(BaseModel):
+@dataclass(slots=True)
+class MemoryEntry:
     """A memory entry."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    content: str = Field(..., description="Memory content")
-    scope: MemoryScope = Field(default=MemoryScope.SESSION)
-    memory_type: MemoryType = Field(default=MemoryType.SHORT_TERM)
+    content: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    scope: MemoryScope = MemoryScope.SESSION
+    memory_type: MemoryType = MemoryType.SHORT_TERM
     
     # Identifiers
     session_id: Optional[str] = None
@@ -46,28 +50,201 @@ class MemoryEntry(BaseModel):
     agent_id: Optional[str] = None
     
     # Metadata
-    metadata: Dict[str, Any] = Field(default_factory=dict)
-    tags: List[str] = Field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
     
     # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    accessed_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    accessed_at: datetime = field(default_factory=datetime.utcnow)
     expires_at: Optional[datetime] = None
     
     # Relevance
-    importance: float = Field(default=0.5, ge=0.0, le=1.0)
-    access_count: int = Field(default=0)
+    importance: float = 0.5
+    access_count: int = 0
     
     # Embedding for semantic search
     embedding: Optional[List[float]] = None
     content_hash: Optional[str] = None
     
-    def touch(self):
+    def __post_init__(self):
+        if not 0.0 <= self.importance <= 1.0:
+            raise ValueError(f"importance must be between 0 and 1, got {self.importance}")
+    
+    def touch(self, now: Optional[datetime] = None):
         """Update access time and count."""
-        self.accessed_at = datetime.utcnow()
+        self.accessed_at = now or datetime.utcnow()
         self.access_count += 1
 
 
+class EmbeddingIndex:
+    """
+    Contiguous matrix of L2-normalized embeddings for semantic search.
+    
+    Rows are stored as float32, or as int8 with a per-row scale when
+    ``quantization="int8"``. Rows are allocated in chunks; deleted rows are
+    masked out and reclaimed by compaction once they make up half of the
+    used rows.
+    """
+    
+    CHUNK_ROWS = 1024
+    
+    def __init__(self, quantization: str = "none"):
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unsupported embedding quantization: {quantization}")
+        self.quantization = quantization
+        self._dtype = np.int8 if quantization == "int8" else np.float32
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive: Optional[np.ndarray] = None
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+    
+    @staticmethod
+    def normalize(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to an L2-normalized float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def add(self, memory_id: str, embedding: List[float]):
+        """Add or replace the embedding for a memory."""
+        vector = self.normalize(embedding)
+        if self._matrix is not None and vector.shape[0] != self._matrix.shape[1]:
+            logger.warning(
+                f"Embedding dimension {vector.shape[0]} does not match index "
+                f"dimension {self._matrix.shape[1]}; skipping memory {memory_id}"
+            )
+            return
+        
+        self.remove(memory_id)
+        row = len(self._ids)
+        if self._matrix is None or row == self._matrix.shape[0]:
+            self._grow(vector.shape[0])
+        
+        if self._scales is not None:
+            # Symmetric per-row int8 quantization
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            self._matrix[row] = np.clip(np.rint(vector / scale), -127, 127)
+            self._scales[row] = scale
+        else:
+            self._matrix[row] = vector
+        self._alive[row] = True
+        self._ids.append(memory_id)
+        self._rows[memory_id] = row
+    
+    def remove(self, memory_id: str):
+        """Mark a memory's row as dead."""
+        row = self._rows.pop(memory_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._ids[row] = None
+        if len(self._ids) - len(self._rows) > len(self._ids) // 2:
+            self._compact()
+    
+    def search(
+        self,
+        query: List[float],
+        candidate_ids: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> List[str]:
+        """Return up to ``limit`` memory IDs ordered by cosine similarity to the query."""
+        if not self._rows or limit <= 0:
+            return []
+        
+        query_vector = self.normalize(query)
+        used = len(self._ids)
+        
+        if candidate_ids is None or len(candidate_ids) >= len(self._rows):
+            rows = None
+            scores = self._score(slice(0, used), query_vector)
+            if candidate_ids is None:
+                scores[~self._alive[:used]] = -np.inf
+            else:
+                allowed = np.zeros(used, dtype=bool)
+                allowed[[self._rows[mid] for mid in candidate_ids if mid in self._rows]] = True
+                scores[~allowed] = -np.inf
+        else:
+            rows = np.fromiter(
+                (self._rows[mid] for mid in candidate_ids if mid in self._rows),
+                dtype=np.intp
+            )
+            if rows.size == 0:
+                return []
+            scores = self._score(rows, query_vector)
+        
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(k)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+        
+        if rows is not None:
+            top = rows[top]
+        return [self._ids[row] for row in top]
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the embedding matrix."""
+        if self._matrix is None:
+            return 0
+        return self._matrix.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+    
+    def _score(self, rows, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the selected rows against a normalized query."""
+        if self._scales is None:
+            return self._matrix[rows] @ query_vector
+        return (self._matrix[rows].astype(np.float32) @ query_vector) * self._scales[rows]
+    
+    def _grow(self, dim: int):
+        """Allocate another chunk of rows."""
+        extra = self.CHUNK_ROWS
+        if self._matrix is None:
+            self._matrix = np.empty((extra, dim), dtype=self._dtype)
+            self._alive = np.zeros(extra, dtype=bool)
+            if self._dtype == np.int8:
+                self._scales = np.zeros(extra, dtype=np.float32)
+            return
+        self._matrix = np.concatenate(
+            [self._matrix, np.empty((extra, self._matrix.shape[1]), dtype=self._dtype)]
+        )
+        self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales, np.zeros(extra, dtype=np.float32)])
+    
+    def _compact(self):
+        """Drop dead rows."""
+        used = len(self._ids)
+        live = np.flatnonzero(self._alive[:used])
+        if live.size == 0:
+            self._matrix = None
+            self._scales = None
+            self._alive = None
+            self._ids = []
+            self._rows = {}
+            return
+        
+        capacity = -(-live.size // self.CHUNK_ROWS) * self.CHUNK_ROWS
+        matrix = np.empty((capacity, self._matrix.shape[1]), dtype=self._dtype)
+        matrix[:live.size] = self._matrix[live]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:live.size] = True
+        if self._scales is not None:
+            scales = np.zeros(capacity, dtype=np.float32)
+            scales[:live.size] = self._scales[live]
+            self._scales = scales
+        
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {mid: row for row, mid in enumerate(self._ids)}
+        self._matrix = matrix
+        self._alive = alive
+
+
 class MemoryConfig(CapabilityConfig):
     """Memory manager configuration."""
     # Short-term memory
@@ -82,6 +259,10 @@ class MemoryConfig(CapabilityConfig):
     embedding_enabled: bool = Field(default=False, description="Enable semantic embeddings")
     embedding_model: Optional[str] = Field(default=None, description="Embedding model name")
     embedding_endpoint: Optional[str] = Field(default=None, description="Embedding API endpoint")
+    embedding_quantization: str = Field(
+        default="none",
+        description="In-memory embedding storage for semantic search: none (float32), int8"
+    )
     
     # Storage
     storage_backend: str = Field(default="memory", description="Storage: memory, redis, vector_db")
@@ -97,6 +278,8 @@ class MemoryManager(Capability):
     version = "1.0.0"
     description = "Multi-scope memory management with semantic retrieval"
     
+    INDEXED_FIELDS = ("scope", "memory_type", "session_id", "user_id", "agent_id")
+    
     def __init__(self, config: Optional[MemoryConfig] = None):
         super().__init__(config or MemoryConfig())
         self.config: MemoryConfig = self.config
@@ -106,6 +289,18 @@ class MemoryManager(Capability):
         self._scope_index: Dict[str, Dict[str, List[str]]] = {
             scope.value: {} for scope in MemoryScope
         }
+        # Secondary indexes: field -> value -> ordered set of memory IDs
+        self._field_index: Dict[str, Dict[Any, Dict[str, None]]] = {
+            name: {} for name in self.INDEXED_FIELDS
+        }
+        self._tag_index: Dict[str, Dict[str, None]] = {}
+        # Content hash -> memory ID for deduplication
+        self._hash_index: Dict[str, str] = {}
+        # Normalized embeddings for semantic search (only when enabled)
+        self._embedding_index: Optional[EmbeddingIndex] = (
+            EmbeddingIndex(self.config.embedding_quantization)
+            if self.config.embedding_enabled else None
+        )
     
     async def _do_initialize(self):
         """Initialize memory manager."""
@@ -122,9 +317,59 @@ class MemoryManager(Capability):
         else:
             return "global"
     
+    def _index_entry(self, entry: MemoryEntry):
+        """Add an entry to the scope and secondary indexes."""
+        scope_key = self._get_scope_key(entry)
+        self._scope_index[entry.scope.value].setdefault(scope_key, []).append(entry.id)
+        
+        for name in self.INDEXED_FIELDS:
+            value = getattr(entry, name)
+            if value is not None:
+                self._field_index[name].setdefault(value, {})[entry.id] = None
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, {})[entry.id] = None
+    
+    def _unindex_entry(self, entry: MemoryEntry):
+        """Remove an entry from the scope and secondary indexes."""
+        scope_key = self._get_scope_key(entry)
+        ids = self._scope_index[entry.scope.value].get(scope_key)
+        if ids and entry.id in ids:
+            ids.remove(entry.id)
+        
+        for name in self.INDEXED_FIELDS:
+            self._discard(self._field_index[name], getattr(entry, name), entry.id)
+        for tag in entry.tags:
+            self._discard(self._tag_index, tag, entry.id)
+    
+    @staticmethod
+    def _discard(index: Dict[Any, Dict[str, None]], key: Any, memory_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(memory_id, None)
+            if not ids:
+                del index[key]
+    
+    def _candidate_ids(self, tags: Optional[List[str]] = None, **filters: Any):
+        """Memory IDs matching all given field filters and any of the given tags."""
+        id_sets = [
+            self._field_index[name].get(value, {})
+            for name, value in filters.items() if value
+        ]
+        if tags:
+            id_sets.append({
+                mid: None for tag in tags for mid in self._tag_index.get(tag, ())
+            })
+        if not id_sets:
+            return self._memories.keys()
+        
+        # Walk the smallest set and probe the others
+        id_sets.sort(key=len)
+        smallest, rest = id_sets[0], id_sets[1:]
+        return [mid for mid in smallest if all(mid in ids for ids in rest)]
+    
     def _compute_hash(self, content: str) -> str:
         """Compute content hash for deduplication."""
-        return hashlib.sha256(content.encode()).hexdigest()[:16]
+        return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
     
     async def store(
         self,
@@ -142,11 +387,13 @@ class MemoryManager(Capability):
         content_hash = self._compute_hash(content)
         
         # Check for duplicate
-        for entry in self._memories.values():
-            if entry.content_hash == content_hash:
-                entry.touch()
-                return entry
+        existing_id = self._hash_index.get(content_hash)
+        if existing_id is not None:
+            entry = self._memories[existing_id]
+            entry.touch()
+            return entry
         
+        now = datetime.utcnow()
         entry = MemoryEntry(
             content=content,
             scope=scope,
@@ -157,7 +404,9 @@ class MemoryManager(Capability):
             metadata=metadata or {},
             tags=tags or [],
             importance=importance,
-            content_hash=content_hash
+            content_hash=content_hash,
+            created_at=now,
+            accessed_at=now
         )
         
         # Generate embedding if enabled
@@ -166,12 +415,12 @@ class MemoryManager(Capability):
         
         # Store
         self._memories[entry.id] = entry
+        self._hash_index[content_hash] = entry.id
+        self._set_vector(entry)
         
-        # Index by scope
+        # Index by scope and filterable fields
         scope_key = self._get_scope_key(entry)
-        if scope_key not in self._scope_index[scope.value]:
-            self._scope_index[scope.value][scope_key] = []
-        self._scope_index[scope.value][scope_key].append(entry.id)
+        self._index_entry(entry)
         
         # Enforce limits
         await self._enforce_limits(scope, scope_key, memory_type)
@@ -201,10 +450,11 @@ class MemoryManager(Capability):
         
         if len(type_ids) > limit:
             # Remove oldest/least important
-            to_remove = sorted(
+            to_remove = heapq.nsmallest(
+                len(type_ids) - limit,
                 type_ids,
                 key=lambda x: (self._memories[x].importance, self._memories[x].accessed_at)
-            )[:len(type_ids) - limit]
+            )
             
             for mid in to_remove:
                 await self.delete(mid)
@@ -222,39 +472,30 @@ class MemoryManager(Capability):
         semantic: bool = False
     ) -> List[MemoryEntry]:
         """Retrieve memories with filtering."""
-        results = list(self._memories.values())
-        
-        # Filter by scope
-        if scope:
-            results = [m for m in results if m.scope == scope]
-        
-        # Filter by type
-        if memory_type:
-            results = [m for m in results if m.memory_type == memory_type]
-        
-        # Filter by identifiers
-        if session_id:
-            results = [m for m in results if m.session_id == session_id]
-        if user_id:
-            results = [m for m in results if m.user_id == user_id]
-        if agent_id:
-            results = [m for m in results if m.agent_id == agent_id]
-        
-        # Filter by tags
-        if tags:
-            results = [m for m in results if any(t in m.tags for t in tags)]
+        # Filter through the secondary indexes
+        results = [
+            self._memories[mid]
+            for mid in self._candidate_ids(
+                tags=tags,
+                scope=scope,
+                memory_type=memory_type,
+                session_id=session_id,
+                user_id=user_id,
+                agent_id=agent_id
+            )
+        ]
         
         # Semantic search if query provided
         if query and semantic and self.config.embedding_enabled:
             results = await self._semantic_search(query, results, limit)
         else:
-            # Sort by recency and importance
-            results.sort(key=lambda m: (m.importance, m.accessed_at), reverse=True)
-            results = results[:limit]
+            # Top entries by importance, then recency
+            results = heapq.nlargest(limit, results, key=lambda m: (m.importance, m.accessed_at))
         
-        # Touch retrieved memories
+        # Touch retrieved memories with a single timestamp
+        now = datetime.utcnow()
         for entry in results:
-            entry.touch()
+            entry.touch(now)
         
         return results
     
@@ -265,26 +506,27 @@ class MemoryManager(Capability):
         limit: int
     ) -> List[MemoryEntry]:
         """Semantic search over memories."""
+        if self._embedding_index is None:
+            return candidates[:limit]
+        
         query_embedding = await self._generate_embedding(query)
         if not query_embedding:
             return candidates[:limit]
         
-        # Compute similarities
-        scored = []
-        for entry in candidates:
-            if entry.embedding:
-                score = self._cosine_similarity(query_embedding, entry.embedding)
-                scored.append((entry, score))
-        
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [e for e, _ in scored[:limit]]
+        # One matrix-vector product over the persistent embedding matrix
+        memory_ids = self._embedding_index.search(
+            query_embedding, [entry.id for entry in candidates], limit
+        )
+        return [self._memories[mid] for mid in memory_ids]
     
-    def _cosine_similarity(self, a: List[float], b: List[float]) -> float:
-        """Compute cosine similarity."""
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+    def _set_vector(self, entry: MemoryEntry):
+        """Index the embedding for an entry."""
+        if self._embedding_index is None:
+            return
+        if entry.embedding:
+            self._embedding_index.add(entry.id, entry.embedding)
+        else:
+            self._embedding_index.remove(entry.id)
     
     async def get(self, memory_id: str) -> Optional[MemoryEntry]:
         """Get a memory by ID."""
@@ -299,10 +541,26 @@ class MemoryManager(Capability):
         if not entry:
             return None
         
+        reindex = any(key in updates for key in self.INDEXED_FIELDS + ('tags',))
+        if reindex:
+            self._unindex_entry(entry)
+        
         for key, value in updates.items():
             if hasattr(entry, key) and key not in ['id', 'created_at']:
                 setattr(entry, key, value)
         
+        if reindex:
+            self._index_entry(entry)
+        
+        if 'content' in updates:
+            if self._hash_index.get(entry.content_hash) == memory_id:
+                del self._hash_index[entry.content_hash]
+            entry.content_hash = self._compute_hash(entry.content)
+            self._hash_index.setdefault(entry.content_hash, memory_id)
+        
+        if 'embedding' in updates:
+            self._set_vector(entry)
+        
         return entry
     
     async def delete(self, memory_id: str) -> bool:
@@ -311,14 +569,14 @@ class MemoryManager(Capability):
         if not entry:
             return False
         
-        # Remove from index
-        scope_key = self._get_scope_key(entry)
-        if scope_key in self._scope_index[entry.scope.value]:
-            ids = self._scope_index[entry.scope.value][scope_key]
-            if memory_id in ids:
-                ids.remove(memory_id)
+        # Remove from indexes
+        self._unindex_entry(entry)
         
         del self._memories[memory_id]
+        if self._hash_index.get(entry.content_hash) == memory_id:
+            del self._hash_index[entry.content_hash]
+        if self._embedding_index is not None:
+            self._embedding_index.remove(memory_id)
         return True
     
     async def consolidate(
@@ -341,8 +599,10 @@ class MemoryManager(Capability):
         consolidated = 0
         for entry in candidates:
             if entry.access_count >= self.config.consolidation_threshold:
+                self._unindex_entry(entry)
                 entry.memory_type = MemoryType.LONG_TERM
                 entry.scope = MemoryScope.USER if entry.user_id else MemoryScope.AGENT
+                self._index_entry(entry)
                 consolidated += 1
         
         if consolidated:
@@ -356,16 +616,7 @@ class MemoryManager(Capability):
         user_id: Optional[str] = None
     ) -> int:
         """Clear memories."""
-        to_delete = []
-        
-        for mid, entry in self._memories.items():
-            if scope and entry.scope != scope:
-                continue
-            if session_id and entry.session_id != session_id:
-                continue
-            if user_id and entry.user_id != user_id:
-                continue
-            to_delete.append(mid)
+        to_delete = list(self._candidate_ids(scope=scope, session_id=session_id, user_id=user_id))
         
         for mid in to_delete:
             await self.delete(mid)
@@ -385,5 +636,6 @@ class MemoryManager(Capability):
             "total_memories": len(self._memories),
             "by_scope": by_scope,
             "by_type": by_type,
-            "embedding_enabled": self.config.embedding_enabled
+            "embedding_enabled": self.config.embedding_enabled,
+            "embedding_bytes": self._embedding_index.nbytes if self._embedding_index is not None else 0
         }
@@ -7,7 +7,14 @@ task type, cost, latency, and availability.
 import logging
 import random
 import asyncio
-from typing import Optional, Dict, Any, List
+import bisect
+import time
+from collections import OrderedDict, deque
+from functools import reduce
+from math import gcd
+import httpx
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Set
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
@@ -60,16 +67,18 @@ class ModelEndpoint(BaseModel):
     input_price: float = 0.001
     output_price: float = 0.002
     avg_latency_ms: float = 500
+    weight: int = Field(default=1, ge=1, description="Relative share for load-balanced routing")
     enabled: bool = True
     healthy: bool = True
     consecutive_failures: int = 0
 
 
-class RoutingDecision(BaseModel):
+@dataclass(slots=True)
+class RoutingDecision:
     """Result of routing decision."""
     endpoint: ModelEndpoint
     reason: str
-    alternatives: List[str] = Field(default_factory=list)
+    alternatives: List[str] = field(default_factory=list)
 
 
 class ModelRouterConfig(CapabilityConfig):
@@ -79,6 +88,13 @@ class ModelRouterConfig(CapabilityConfig):
     max_fallback_attempts: int = 3
     health_check_interval: int = 60
     unhealthy_threshold: int = 3
+    health_probe_enabled: bool = Field(default=False, description="Actively probe endpoints every health_check_interval")
+    health_probe_timeout: float = 5.0
+    route_cache_size: int = Field(default=256, description="Cached routing decisions (0 disables)")
+    route_cache_ttl_seconds: float = Field(default=5.0, description="Lifetime of a cached routing decision")
+    latency_ema_alpha: float = Field(default=0.1, gt=0.0, le=1.0, description="Weight of each new latency sample")
+    latency_batch_size: int = Field(default=8, description="Apply buffered latency samples after this many")
+    latency_flush_seconds: float = Field(default=1.0, description="Also apply them on the next report once the oldest is this old")
     task_routing: Dict[str, str] = Field(default_factory=lambda: {
         "simple_qa": "economy",
         "complex_reasoning": "premium",
@@ -87,6 +103,41 @@ class ModelRouterConfig(CapabilityConfig):
     })
 
 
+class WeightedScheduler:
+    """
+    Interleaved weighted round robin over endpoint IDs.
+    
+    Each endpoint gets ``weight`` turns per cycle (weights reduced by their
+    GCD), spread across the cycle rather than served back to back. Picks
+    are O(1) and reuse the same queue entries.
+    """
+    
+    def __init__(self, weights: Dict[str, int]):
+        divisor = reduce(gcd, weights.values(), 0) or 1
+        self._weights = {endpoint_id: weight // divisor for endpoint_id, weight in weights.items()}
+        self._cycle_length = sum(self._weights.values())
+        # [endpoint_id, turns left this cycle]
+        self._current = deque([endpoint_id, weight] for endpoint_id, weight in self._weights.items())
+        self._next: deque = deque()
+    
+    def pick(self, candidate_ids: Set[str]) -> Optional[str]:
+        """Return the next scheduled endpoint among candidate_ids."""
+        # Turns of non-candidates are consumed, so each candidate comes up within one cycle
+        for _ in range(self._cycle_length):
+            if not self._current:
+                self._current, self._next = self._next, self._current
+            entry = self._current.popleft()
+            entry[1] -= 1
+            if entry[1] == 0:
+                entry[1] = self._weights[entry[0]]
+                self._next.append(entry)
+            else:
+                self._current.append(entry)
+            if entry[0] in candidate_ids:
+                return entry[0]
+        return None
+
+
 class ModelRouter(Capability):
     """Model routing capability."""
     
@@ -94,16 +145,53 @@ class ModelRouter(Capability):
     version = "1.0.0"
     description = "Intelligent model routing"
     
+    # Strategies whose choice depends only on the candidates, so decisions can be cached
+    CACHEABLE_STRATEGIES = frozenset({
+        RoutingStrategy.LEAST_COST,
+        RoutingStrategy.LEAST_LATENCY,
+        RoutingStrategy.TASK_BASED,
+        RoutingStrategy.FALLBACK,
+    })
+    
     def __init__(self, config: Optional[ModelRouterConfig] = None):
         super().__init__(config or ModelRouterConfig())
         self.config: ModelRouterConfig = self.config
         self._endpoints: Dict[str, ModelEndpoint] = {}
-        self._round_robin_index: int = 0
+        # Ordered sets of endpoint IDs (registration order) for candidate lookup
+        self._by_tier: Dict[ModelTier, Dict[str, None]] = {}
+        self._by_task: Dict[TaskType, Dict[str, None]] = {}
+        self._healthy: Dict[str, None] = {}
+        # Endpoints ranked by (cost, registration order) and (latency, registration order)
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._by_cost: List[Tuple[float, int, str]] = []
+        self._by_latency: List[Tuple[float, int, str]] = []
+        # Cost ranking per tier value, for task-based routing to a preferred tier
+        self._cost_by_tier: Dict[str, List[Tuple[float, int, str]]] = {}
+        # What each endpoint was indexed under: (cost key, latency key, tier, tasks),
+        # so it can be removed after its fields change
+        self._rank_keys: Dict[
+            str, Tuple[Tuple[float, int, str], Tuple[float, int, str], ModelTier, Tuple[TaskType, ...]]
+        ] = {}
+        # Buffered latency samples per endpoint: [sum, count, first sample time]
+        self._latency_buffer: Dict[str, List[float]] = {}
+        # (task, strategy, tier, excluded IDs) -> (decision, expiry)
+        self._route_cache: "OrderedDict[tuple, Tuple[RoutingDecision, float]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Round-robin position per candidate set (IDs in registration order)
+        self._round_robin_index: Dict[Tuple[str, ...], int] = {}
+        # Built on first load-balanced route after the endpoint set changes
+        self._scheduler: Optional[WeightedScheduler] = None
         self._health_task: Optional[asyncio.Task] = None
+        self._probe_client: Optional[httpx.AsyncClient] = None
     
     async def _do_initialize(self):
         """Initialize model router."""
-        self._health_task = asyncio.create_task(self._health_loop())
+        # Health flags follow report_success/report_failure; the loop only runs to probe
+        if self.config.health_probe_enabled:
+            self._probe_client = httpx.AsyncClient(timeout=self.config.health_probe_timeout)
+            self._health_task = asyncio.create_task(self._health_loop())
         logger.info("Model router initialized")
     
     async def _do_shutdown(self):
@@ -114,40 +202,173 @@ class ModelRouter(Capability):
                 await self._health_task
             except asyncio.CancelledError:
                 pass
+        if self._probe_client is not None:
+            await self._probe_client.aclose()
+            self._probe_client = None
     
     async def _health_loop(self):
         """Background health checking."""
         while True:
             try:
                 await asyncio.sleep(self.config.health_check_interval)
-                for ep in self._endpoints.values():
-                    ep.healthy = ep.consecutive_failures < self.config.unhealthy_threshold
+                # Probe all endpoints concurrently so a check takes as long as the slowest one
+                await asyncio.gather(
+                    *(self._probe(ep) for ep in list(self._endpoints.values())),
+                    return_exceptions=True
+                )
             except asyncio.CancelledError:
                 break
     
+    async def _probe(self, endpoint: ModelEndpoint):
+        """Probe an endpoint; server errors and connection failures count as failures."""
+        try:
+            response = await self._probe_client.get(endpoint.endpoint)
+            reachable = response.status_code < 500
+        except httpx.HTTPError:
+            reachable = False
+        
+        if reachable:
+            endpoint.consecutive_failures = 0
+            self._set_healthy(endpoint, True)
+        else:
+            await self.report_failure(endpoint.id)
+    
     async def register_endpoint(self, endpoint: ModelEndpoint) -> ModelEndpoint:
         """Register a model endpoint."""
+        existing = self._endpoints.get(endpoint.id)
+        if existing:
+            self._unindex_endpoint(existing.id)
         self._endpoints[endpoint.id] = endpoint
+        self._index_endpoint(endpoint)
+        self.invalidate_cache()
+        self._round_robin_index.clear()
+        self._scheduler = None
         logger.info(f"Registered endpoint: {endpoint.name}")
         return endpoint
     
     async def unregister_endpoint(self, endpoint_id: str) -> bool:
         """Unregister an endpoint."""
-        if endpoint_id in self._endpoints:
-            del self._endpoints[endpoint_id]
+        endpoint = self._endpoints.pop(endpoint_id, None)
+        if endpoint:
+            self._unindex_endpoint(endpoint_id)
+            del self._order[endpoint_id]
+            self._latency_buffer.pop(endpoint_id, None)
+            self.invalidate_cache()
+            self._round_robin_index.clear()
+            self._scheduler = None
             return True
         return False
     
+    def _index_endpoint(self, endpoint: ModelEndpoint):
+        """Add an endpoint to the tier, task, health and ranking indexes."""
+        order = self._order.get(endpoint.id)
+        if order is None:
+            order = self._order[endpoint.id] = self._next_order
+            self._next_order += 1
+        cost_key = self._cost_key(endpoint, order)
+        latency_key = self._latency_key(endpoint, order)
+        bisect.insort(self._by_cost, cost_key)
+        bisect.insort(self._by_latency, latency_key)
+        bisect.insort(self._cost_by_tier.setdefault(endpoint.tier.value, []), cost_key)
+        tasks = tuple(endpoint.supported_tasks)
+        self._rank_keys[endpoint.id] = (cost_key, latency_key, endpoint.tier, tasks)
+        self._add_ordered(self._by_tier.setdefault(endpoint.tier, {}), endpoint.id)
+        for task in tasks:
+            self._add_ordered(self._by_task.setdefault(task, {}), endpoint.id)
+        if endpoint.healthy:
+            self._add_ordered(self._healthy, endpoint.id)
+    
+    def _unindex_endpoint(self, endpoint_id: str):
+        """Remove an endpoint from the tier, task, health and ranking indexes."""
+        # Uses the stored keys, since the endpoint's fields may have changed since indexing
+        cost_key, latency_key, tier, tasks = self._rank_keys.pop(endpoint_id)
+        self._remove_ranked(self._by_cost, cost_key)
+        self._remove_ranked(self._by_latency, latency_key)
+        self._remove_ranked(self._cost_by_tier.get(tier.value, []), cost_key)
+        self._by_tier.get(tier, {}).pop(endpoint_id, None)
+        for task in tasks:
+            self._by_task.get(task, {}).pop(endpoint_id, None)
+        self._healthy.pop(endpoint_id, None)
+    
+    def _add_ordered(self, index: Dict[str, None], endpoint_id: str):
+        """Add an ID to an index, keeping the index in registration order."""
+        if endpoint_id in index:
+            return
+        last = next(reversed(index), None)
+        index[endpoint_id] = None
+        # Re-added (recovered or re-registered) endpoints go back to their original slot
+        if last is not None and self._order[last] > self._order[endpoint_id]:
+            ordered = sorted(index, key=self._order.__getitem__)
+            index.clear()
+            index.update(dict.fromkeys(ordered))
+    
+    @staticmethod
+    def _cost_key(endpoint: ModelEndpoint, order: int) -> Tuple[float, int, str]:
+        """Ranking key for least-cost routing."""
+        return (endpoint.input_price + endpoint.output_price, order, endpoint.id)
+    
+    @staticmethod
+    def _latency_key(endpoint: ModelEndpoint, order: int) -> Tuple[float, int, str]:
+        """Ranking key for least-latency routing."""
+        return (endpoint.avg_latency_ms, order, endpoint.id)
+    
+    @staticmethod
+    def _remove_ranked(ranking: List[Tuple[float, int, str]], key: Tuple[float, int, str]):
+        """Remove an entry from a sorted ranking."""
+        i = bisect.bisect_left(ranking, key)
+        if i < len(ranking) and ranking[i] == key:
+            del ranking[i]
+    
+    def _set_healthy(self, endpoint: ModelEndpoint, healthy: bool):
+        """Update an endpoint's health and the health index."""
+        if endpoint.healthy != healthy:
+            self.invalidate_cache()
+        endpoint.healthy = healthy
+        if healthy:
+            self._add_ordered(self._healthy, endpoint.id)
+        else:
+            self._healthy.pop(endpoint.id, None)
+    
+    def reindex_endpoint(self, endpoint_id: str) -> bool:
+        """Re-index an endpoint after its fields were changed in place."""
+        endpoint = self._endpoints.get(endpoint_id)
+        if endpoint is None:
+            return False
+        self._unindex_endpoint(endpoint_id)
+        self._index_endpoint(endpoint)
+        self.invalidate_cache()
+        self._round_robin_index.clear()
+        self._scheduler = None
+        return True
+    
+    def invalidate_cache(self):
+        """Drop cached routing decisions (use reindex_endpoint after editing an endpoint)."""
+        self._route_cache.clear()
+    
+    def _available(
+        self,
+        endpoint_ids: Dict[str, None],
+        required_tier: Optional[ModelTier],
+        exclude_ids
+    ) -> List[ModelEndpoint]:
+        """Enabled, healthy, non-excluded endpoints among the given IDs."""
+        endpoints = self._endpoints
+        return [
+            endpoints[eid] for eid in endpoint_ids
+            if eid in self._healthy and eid not in exclude_ids and endpoints[eid].enabled
+            and (required_tier is None or endpoints[eid].tier == required_tier)
+        ]
+    
     async def get_endpoint(self, endpoint_id: str) -> Optional[ModelEndpoint]:
         """Get an endpoint by ID."""
         return self._endpoints.get(endpoint_id)
     
     async def list_endpoints(self, healthy_only: bool = False) -> List[ModelEndpoint]:
         """List all endpoints."""
-        endpoints = list(self._endpoints.values())
         if healthy_only:
-            endpoints = [e for e in endpoints if e.healthy and e.enabled]
-        return endpoints
+            endpoints = self._endpoints
+            return [endpoints[eid] for eid in self._healthy if endpoints[eid].enabled]
+        return list(self._endpoints.values())
     
     async def route(
         self,
@@ -158,20 +379,26 @@ class ModelRouter(Capability):
     ) -> Optional[RoutingDecision]:
         """Route to the best model endpoint."""
         strategy = strategy or self.config.default_strategy
-        exclude_ids = exclude_ids or []
-        
-        candidates = [
-            e for e in self._endpoints.values()
-            if e.enabled and e.healthy and e.id not in exclude_ids
-        ]
+        exclude_ids = set(exclude_ids) if exclude_ids else ()
         
-        if required_tier:
-            candidates = [e for e in candidates if e.tier == required_tier]
+        cache_key = None
+        if strategy in self.CACHEABLE_STRATEGIES and self.config.route_cache_size > 0:
+            cache_key = (task_type, strategy, required_tier, tuple(sorted(exclude_ids)))
+            cached = self._route_cache.get(cache_key)
+            if cached and cached[1] > time.monotonic():
+                self._route_cache.move_to_end(cache_key)
+                self._cache_hits += 1
+                return cached[0]
+            self._cache_misses += 1
         
+        # Start from the narrowest index; fall back to all tier/healthy endpoints
+        # when none support the task
+        candidates = []
         if task_type:
-            task_candidates = [e for e in candidates if task_type in e.supported_tasks]
-            if task_candidates:
-                candidates = task_candidates
+            candidates = self._available(self._by_task.get(task_type, {}), required_tier, exclude_ids)
+        if not candidates:
+            pool = self._by_tier.get(required_tier, {}) if required_tier else self._healthy
+            candidates = self._available(pool, required_tier, exclude_ids)
         
         if not candidates:
             return None
@@ -188,6 +415,9 @@ class ModelRouter(Capability):
         elif strategy == RoutingStrategy.TASK_BASED:
             endpoint = self._route_task_based(candidates, task_type)
             reason = f"Best for {task_type.value if task_type else 'general'}"
+        elif strategy == RoutingStrategy.LOAD_BALANCED:
+            endpoint = self._route_load_balanced(candidates)
+            reason = "Weighted round robin selection"
         elif strategy == RoutingStrategy.RANDOM:
             endpoint = random.choice(candidates)
             reason = "Random selection"
@@ -197,24 +427,60 @@ class ModelRouter(Capability):
         
         alternatives = [e.id for e in candidates if e.id != endpoint.id][:3]
         
-        return RoutingDecision(
+        decision = RoutingDecision(
             endpoint=endpoint,
             reason=reason,
             alternatives=alternatives
         )
+        if cache_key is not None:
+            self._cache_decision(cache_key, decision)
+        return decision
+    
+    def _cache_decision(self, cache_key: tuple, decision: RoutingDecision):
+        """Add a decision to the LRU route cache."""
+        expires = time.monotonic() + self.config.route_cache_ttl_seconds
+        self._route_cache[cache_key] = (decision, expires)
+        self._route_cache.move_to_end(cache_key)
+        while len(self._route_cache) > self.config.route_cache_size:
+            self._route_cache.popitem(last=False)
     
     def _route_round_robin(self, candidates: List[ModelEndpoint]) -> ModelEndpoint:
         """Round robin routing."""
-        self._round_robin_index = (self._round_robin_index + 1) % len(candidates)
-        return candidates[self._round_robin_index]
+        key = tuple(e.id for e in candidates)
+        index = (self._round_robin_index.get(key, -1) + 1) % len(candidates)
+        self._round_robin_index[key] = index
+        return candidates[index]
+    
+    def _route_load_balanced(self, candidates: List[ModelEndpoint]) -> ModelEndpoint:
+        """Interleaved weighted round robin routing."""
+        if self._scheduler is None:
+            self._scheduler = WeightedScheduler({
+                endpoint_id: endpoint.weight for endpoint_id, endpoint in self._endpoints.items()
+            })
+        endpoint_id = self._scheduler.pick({e.id for e in candidates})
+        return self._endpoints[endpoint_id] if endpoint_id else candidates[0]
     
     def _route_least_cost(self, candidates: List[ModelEndpoint]) -> ModelEndpoint:
         """Route to cheapest model."""
-        return min(candidates, key=lambda e: e.input_price + e.output_price)
+        return self._first_ranked(self._by_cost, candidates)
     
     def _route_least_latency(self, candidates: List[ModelEndpoint]) -> ModelEndpoint:
         """Route to fastest model."""
-        return min(candidates, key=lambda e: e.avg_latency_ms)
+        return self._first_ranked(self._by_latency, candidates)
+    
+    def _first_ranked(
+        self,
+        ranking: List[Tuple[float, int, str]],
+        candidates: List[ModelEndpoint]
+    ) -> ModelEndpoint:
+        """Return the best-ranked candidate (ties go to the earliest registered)."""
+        if len(candidates) == 1:
+            return candidates[0]
+        candidate_ids = {e.id for e in candidates}
+        for _, _, endpoint_id in ranking:
+            if endpoint_id in candidate_ids:
+                return self._endpoints[endpoint_id]
+        return candidates[0]
     
     def _route_task_based(
         self,
@@ -225,9 +491,11 @@ class ModelRouter(Capability):
         if task_type:
             preferred_tier = self.config.task_routing.get(task_type.value)
             if preferred_tier:
-                tier_candidates = [e for e in candidates if e.tier.value == preferred_tier]
-                if tier_candidates:
-                    return self._route_least_cost(tier_candidates)
+                # Cheapest candidate in the preferred tier, from the tier's cost ranking
+                candidate_ids = {e.id for e in candidates}
+                for _, _, endpoint_id in self._cost_by_tier.get(preferred_tier, ()):
+                    if endpoint_id in candidate_ids:
+                        return self._endpoints[endpoint_id]
         return self._route_least_cost(candidates)
     
     async def report_success(self, endpoint_id: str, latency_ms: float):
@@ -235,18 +503,54 @@ class ModelRouter(Capability):
         if endpoint_id in self._endpoints:
             ep = self._endpoints[endpoint_id]
             ep.consecutive_failures = 0
-            ep.avg_latency_ms = (ep.avg_latency_ms + latency_ms) / 2
+            self._set_healthy(ep, True)
+            
+            now = time.monotonic()
+            buffered = self._latency_buffer.get(endpoint_id)
+            if buffered is None:
+                buffered = self._latency_buffer[endpoint_id] = [0.0, 0, now]
+            buffered[0] += latency_ms
+            buffered[1] += 1
+            if (buffered[1] >= self.config.latency_batch_size
+                    or now - buffered[2] >= self.config.latency_flush_seconds):
+                del self._latency_buffer[endpoint_id]
+                self._apply_latency(ep, buffered[0] / buffered[1], buffered[1])
+    
+    def _apply_latency(self, endpoint: ModelEndpoint, mean_latency_ms: float, samples: int):
+        """Fold a batch of latency samples into the endpoint's EMA and re-rank it."""
+        # Same result as applying the EMA once per sample if every sample were the mean
+        weight = 1 - (1 - self.config.latency_ema_alpha) ** samples
+        cost_key, latency_key, tier, tasks = self._rank_keys[endpoint.id]
+        old_rank = bisect.bisect_left(self._by_latency, latency_key)
+        self._remove_ranked(self._by_latency, latency_key)
+        endpoint.avg_latency_ms += weight * (mean_latency_ms - endpoint.avg_latency_ms)
+        latency_key = self._latency_key(endpoint, self._order[endpoint.id])
+        new_rank = bisect.bisect_left(self._by_latency, latency_key)
+        self._by_latency.insert(new_rank, latency_key)
+        self._rank_keys[endpoint.id] = (cost_key, latency_key, tier, tasks)
+        if new_rank != old_rank:
+            # The latency order changed, so cached least-latency picks may be stale
+            for cache_key in [k for k in self._route_cache if k[1] == RoutingStrategy.LEAST_LATENCY]:
+                del self._route_cache[cache_key]
     
     async def report_failure(self, endpoint_id: str):
         """Report failed request."""
         if endpoint_id in self._endpoints:
-            self._endpoints[endpoint_id].consecutive_failures += 1
+            ep = self._endpoints[endpoint_id]
+            ep.consecutive_failures += 1
+            if ep.consecutive_failures >= self.config.unhealthy_threshold:
+                self._set_healthy(ep, False)
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get router stats."""
-        healthy = sum(1 for e in self._endpoints.values() if e.healthy)
+        healthy = len(self._healthy)
         return {
             "total_endpoints": len(self._endpoints),
             "healthy_endpoints": healthy,
-            "default_strategy": self.config.default_strategy.value
+            "default_strategy": self.config.default_strategy.value,
+            "route_cache": {
+                "size": len(self._route_cache),
+                "hits": self._cache_hits,
+                "misses": self._cache_misses
+            }
         }
@@ -7,14 +7,22 @@ and scopes.
 import logging
 import asyncio
 import time
-from typing import Optional, Dict, Any, List
+import uuid
+from typing import Optional, Dict, Any, List, Deque, Union, Tuple
 from datetime import datetime
 from enum import Enum
+import numpy as np
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 
 from .base import Capability, CapabilityConfig
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,7 +73,8 @@ class RateLimitRule(BaseModel):
     retry_after_seconds: int = Field(default=60)
 
 
-class RateLimitResult(BaseModel):
+@dataclass(slots=True)
+class RateLimitResult:
     """Result of rate limit check."""
     allowed: bool = True
     rule_id: Optional[str] = None
@@ -97,6 +106,15 @@ class RateLimitConfig(CapabilityConfig):
     # Cleanup
     cleanup_interval_seconds: int = Field(default=60)
     
+    # Shared state for the default limits across replicas
+    backend: str = Field(default="memory", description="Default-limit state: memory, redis")
+    redis_url: str = Field(default="redis://localhost:6379/0")
+    redis_key_prefix: str = Field(default="ratelimit:")
+    redis_local_cache_ms: int = Field(
+        default=100,
+        description="Reject locally for this long after Redis reports a key over its limit"
+    )
+    
     # Custom rules
     rules: List[RateLimitRule] = Field(default_factory=list)
 
@@ -104,27 +122,34 @@ class RateLimitConfig(CapabilityConfig):
 class TokenBucket:
     """Token bucket implementation."""
     
+    __slots__ = ("rate", "capacity", "tokens", "last_update")
+    
     def __init__(self, rate: float, capacity: int):
         self.rate = rate  # Tokens per second
         self.capacity = capacity
         self.tokens = capacity
-        self.last_update = time.time()
-        self._lock = asyncio.Lock()
+        self.last_update = time.monotonic()
     
     async def acquire(self, tokens: int = 1) -> bool:
         """Try to acquire tokens."""
-        async with self._lock:
-            now = time.time()
-            elapsed = now - self.last_update
-            
-            # Add tokens based on elapsed time
-            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
-            self.last_update = now
-            
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                return True
-            return False
+        return self.try_acquire(tokens)
+    
+    def try_acquire(self, tokens: int = 1) -> bool:
+        """Try to acquire tokens without going through a coroutine."""
+        # Synchronous, so the update is atomic on the event loop without a lock
+        now = time.monotonic()
+        
+        # Add tokens based on elapsed time
+        available = self.tokens + (now - self.last_update) * self.rate
+        if available > self.capacity:
+            available = self.capacity
+        self.last_update = now
+        
+        if available >= tokens:
+            self.tokens = available - tokens
+            return True
+        self.tokens = available
+        return False
     
     def get_wait_time(self, tokens: int = 1) -> float:
         """Get time to wait for tokens."""
@@ -137,30 +162,35 @@ class TokenBucket:
 class SlidingWindow:
     """Sliding window counter implementation."""
     
+    __slots__ = ("window_seconds", "max_requests", "requests")
+    
     def __init__(self, window_seconds: int, max_requests: int):
         self.window_seconds = window_seconds
         self.max_requests = max_requests
-        self.requests: List[float] = []
-        self._lock = asyncio.Lock()
+        # Request timestamps, oldest first
+        self.requests: Deque[float] = deque()
+    
+    def _evict(self, now: float):
+        """Drop requests that have left the window."""
+        cutoff = now - self.window_seconds
+        requests = self.requests
+        while requests and requests[0] <= cutoff:
+            requests.popleft()
     
     async def record(self) -> bool:
         """Record a request and check if allowed."""
-        async with self._lock:
-            now = time.time()
-            cutoff = now - self.window_seconds
-            
-            # Remove old requests
-            self.requests = [t for t in self.requests if t > cutoff]
-            
-            if len(self.requests) < self.max_requests:
-                self.requests.append(now)
-                return True
-            return False
+        now = time.monotonic()
+        self._evict(now)
+        
+        if len(self.requests) < self.max_requests:
+            self.requests.append(now)
+            return True
+        return False
     
     def get_count(self) -> int:
         """Get current request count."""
-        cutoff = time.time() - self.window_seconds
-        return len([t for t in self.requests if t > cutoff])
+        self._evict(time.monotonic())
+        return len(self.requests)
     
     def get_remaining(self) -> int:
         """Get remaining requests."""
@@ -170,8 +200,250 @@ class SlidingWindow:
         """Get time until window resets."""
         if not self.requests:
             return 0
-        oldest = min(self.requests)
-        return max(0, oldest + self.window_seconds - time.time())
+        return max(0, self.requests[0] + self.window_seconds - time.monotonic())
+
+
+class NumpySlidingWindow:
+    """
+    Exact sliding window for large limits, with timestamps in a numpy buffer.
+    
+    Expired timestamps are skipped with a binary search instead of popped one
+    at a time. At most ``max_requests`` timestamps are live; the buffer starts
+    small and doubles (up to twice that) while mostly live, otherwise the live
+    range is moved to the front when the end is reached.
+    """
+    
+    __slots__ = ("window_seconds", "max_requests", "_buffer", "_capacity", "_head", "_tail")
+    
+    INITIAL_SIZE = 64
+    
+    def __init__(self, window_seconds: int, max_requests: int):
+        self.window_seconds = window_seconds
+        self.max_requests = max_requests
+        self._capacity = max(2 * max_requests, 1)
+        self._buffer = np.empty(min(self.INITIAL_SIZE, self._capacity), dtype=np.float64)
+        self._head = 0
+        self._tail = 0
+    
+    def _evict(self, now: float):
+        """Drop requests that have left the window."""
+        cutoff = now - self.window_seconds
+        live = self._buffer[self._head:self._tail]
+        self._head += int(np.searchsorted(live, cutoff, side="right"))
+    
+    async def record(self) -> bool:
+        """Record a request and check if allowed."""
+        now = time.monotonic()
+        self._evict(now)
+        
+        if self._tail - self._head >= self.max_requests:
+            return False
+        if self._tail == len(self._buffer):
+            count = self._tail - self._head
+            size = len(self._buffer)
+            if 2 * count > size and size < self._capacity:
+                # Mostly live: compacting would free little, so grow instead
+                buffer = np.empty(min(2 * size, self._capacity), dtype=np.float64)
+                buffer[:count] = self._buffer[self._head:self._tail]
+                self._buffer = buffer
+            else:
+                self._buffer[:count] = self._buffer[self._head:self._tail]
+            self._head, self._tail = 0, count
+        self._buffer[self._tail] = now
+        self._tail += 1
+        return True
+    
+    def get_count(self) -> int:
+        """Get current request count."""
+        self._evict(time.monotonic())
+        return self._tail - self._head
+    
+    def get_remaining(self) -> int:
+        """Get remaining requests."""
+        return max(0, self.max_requests - self.get_count())
+    
+    def get_reset_time(self) -> float:
+        """Get time until window resets."""
+        if self._tail == self._head:
+            return 0
+        return max(0, float(self._buffer[self._head]) + self.window_seconds - time.monotonic())
+
+
+class FixedWindow:
+    """
+    Fixed window counter: one count per window, O(1) memory per key.
+    
+    With ``weighted=True`` the previous window's count is blended in by the
+    fraction of it still covered by a sliding window, approximating a
+    sliding window without storing timestamps.
+    """
+    
+    __slots__ = ("window_seconds", "max_requests", "weighted", "window_start", "count", "previous_count")
+    
+    def __init__(self, window_seconds: int, max_requests: int, weighted: bool = False):
+        self.window_seconds = window_seconds
+        self.max_requests = max_requests
+        self.weighted = weighted
+        self.window_start = time.monotonic()
+        self.count = 0
+        self.previous_count = 0
+    
+    def _roll(self, now: float):
+        """Advance to the window containing now."""
+        elapsed = now - self.window_start
+        if elapsed >= self.window_seconds:
+            windows = int(elapsed // self.window_seconds)
+            self.previous_count = self.count if windows == 1 else 0
+            self.count = 0
+            self.window_start += windows * self.window_seconds
+    
+    def _estimate(self, now: float) -> float:
+        """Requests counted against the limit at now."""
+        if not self.weighted:
+            return self.count
+        overlap = 1 - (now - self.window_start) / self.window_seconds
+        return self.count + self.previous_count * overlap
+    
+    async def record(self) -> bool:
+        """Record a request and check if allowed."""
+        now = time.monotonic()
+        self._roll(now)
+        if self._estimate(now) < self.max_requests:
+            self.count += 1
+            return True
+        return False
+    
+    def get_count(self) -> int:
+        """Get current request count."""
+        now = time.monotonic()
+        self._roll(now)
+        return int(self._estimate(now))
+    
+    def get_remaining(self) -> int:
+        """Get remaining requests."""
+        return max(0, self.max_requests - self.get_count())
+    
+    def get_reset_time(self) -> float:
+        """Get time until window resets."""
+        return max(0, self.window_start + self.window_seconds - time.monotonic())
+
+
+class RedisWindow:
+    """
+    Request window whose state lives in Redis, shared by all replicas.
+    
+    Sliding windows use a sorted set of request timestamps (ZREMRANGEBYSCORE,
+    ZADD, ZCARD in one transaction); fixed windows use INCR on a per-window
+    key. Counts are the last values seen from Redis, and a key found over
+    its limit is rejected locally for ``local_cache_seconds`` without a
+    round trip. Redis errors fail open.
+    """
+    
+    __slots__ = (
+        "client", "key", "window_seconds", "max_requests", "sliding",
+        "local_cache_seconds", "count", "reset_at", "rejected_until"
+    )
+    
+    # Fail-open warnings are shared by all windows and logged at most once per interval
+    _WARNING_INTERVAL = 60.0
+    _last_warning = 0.0
+    _suppressed_warnings = 0
+    
+    def __init__(
+        self,
+        client,
+        key: str,
+        window_seconds: int,
+        max_requests: int,
+        sliding: bool = True,
+        local_cache_seconds: float = 0.1
+    ):
+        self.client = client
+        self.key = key
+        self.window_seconds = window_seconds
+        self.max_requests = max_requests
+        self.sliding = sliding
+        self.local_cache_seconds = local_cache_seconds
+        self.count = 0
+        self.reset_at = 0.0
+        self.rejected_until = 0.0
+    
+    async def record(self) -> bool:
+        """Record a request and check if allowed."""
+        # Wall-clock time so that all replicas agree on window boundaries
+        now = time.time()
+        if now < self.rejected_until:
+            return False
+        
+        try:
+            if self.sliding:
+                allowed = await self._record_sliding(now)
+            else:
+                allowed = await self._record_fixed(now)
+        except Exception as e:
+            self._warn_fail_open(now, e)
+            return True
+        
+        if not allowed:
+            self.rejected_until = now + self.local_cache_seconds
+        return allowed
+    
+    def _warn_fail_open(self, now: float, error: Exception):
+        """Log a Redis failure, rate-limited so an outage doesn't flood the log."""
+        cls = type(self)
+        if now - cls._last_warning < cls._WARNING_INTERVAL:
+            cls._suppressed_warnings += 1
+            logger.debug(f"Redis rate limit check failed for {self.key}, allowing: {error}")
+            return
+        suppressed = cls._suppressed_warnings
+        cls._last_warning = now
+        cls._suppressed_warnings = 0
+        logger.warning(
+            f"Redis rate limit check failed for {self.key}, allowing: {error}"
+            + (f" ({suppressed} similar failures suppressed)" if suppressed else "")
+        )
+    
+    async def _record_sliding(self, now: float) -> bool:
+        member = uuid.uuid4().hex
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(self.key, 0, now - self.window_seconds)
+            pipe.zadd(self.key, {member: now})
+            pipe.zcard(self.key)
+            pipe.expire(self.key, self.window_seconds)
+            _, _, count, _ = await pipe.execute()
+        
+        if count > self.max_requests:
+            # Rejected requests do not count against the window
+            await self.client.zrem(self.key, member)
+            self.count = count - 1
+            return False
+        self.count = count
+        self.reset_at = now + self.window_seconds
+        return True
+    
+    async def _record_fixed(self, now: float) -> bool:
+        window_index = int(now // self.window_seconds)
+        key = f"{self.key}:{window_index}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, self.window_seconds)
+            count, _ = await pipe.execute()
+        
+        self.count = min(count, self.max_requests)
+        self.reset_at = (window_index + 1) * self.window_seconds
+        return count <= self.max_requests
+    
+    def get_count(self) -> int:
+        """Get the request count last reported by Redis."""
+        return self.count
+    
+    def get_remaining(self) -> int:
+        """Get remaining requests."""
+        return max(0, self.max_requests - self.count)
+    
+    def get_reset_time(self) -> float:
+        """Get time until window resets."""
+        return max(0, self.reset_at - time.time())
 
 
 class RateLimiter(Capability):
@@ -185,13 +457,31 @@ class RateLimiter(Capability):
         super().__init__(config or RateLimitConfig())
         self.config: RateLimitConfig = self.config
         
-        # Limiters by scope
-        self._windows: Dict[str, SlidingWindow] = {}
+        # Limiters by scope; only touched on the event loop, so no locks are needed
+        # (RedisWindow awaits, but each Redis update is a single atomic transaction)
+        self._windows: Dict[str, Union[SlidingWindow, NumpySlidingWindow, FixedWindow, RedisWindow]] = {}
         self._buckets: Dict[str, TokenBucket] = {}
+        # Window keys by window length, ordered by last use, for idle cleanup
+        self._window_last_used: Dict[int, "OrderedDict[str, float]"] = {}
         self._cleanup_task: Optional[asyncio.Task] = None
+        self._redis = None
+        
+        # Rules restricted to one user or agent, by (scope, scope_key), and rules
+        # that apply to every request; entries carry their position in config.rules
+        self._keyed_rules: Dict[Tuple[RateLimitScope, str], List[Tuple[int, RateLimitRule]]] = {}
+        self._unkeyed_rules: List[Tuple[int, RateLimitRule]] = []
+        # Request windows each rule enforces, by rule ID
+        self._rule_windows: Dict[str, Tuple[Tuple[str, int, int, str], ...]] = {}
+        self._index_rules()
     
     async def _do_initialize(self):
         """Initialize rate limiter."""
+        if self.config.backend == "redis":
+            if aioredis is None:
+                logger.warning("redis package not installed; default rate limits stay in memory")
+            else:
+                self._redis = aioredis.from_url(self.config.redis_url)
+        
         # Start cleanup task
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
         logger.info("Rate limiter initialized")
@@ -204,6 +494,9 @@ class RateLimiter(Capability):
                 await self._cleanup_task
             except asyncio.CancelledError:
                 pass
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
     
     async def _cleanup_loop(self):
         """Background cleanup of old entries."""
@@ -218,16 +511,56 @@ class RateLimiter(Capability):
     
     async def _cleanup(self):
         """Clean up old rate limit entries."""
-        # Remove windows with no recent activity
-        now = time.time()
-        to_remove = []
-        
-        for key, window in self._windows.items():
-            if window.get_count() == 0:
-                to_remove.append(key)
-        
-        for key in to_remove:
-            del self._windows[key]
+        # Remove windows idle for two window lengths: by then both the current and
+        # previous window are empty. Only the expired prefix of each LRU is visited.
+        now = time.monotonic()
+        for window_seconds, last_used in self._window_last_used.items():
+            cutoff = now - 2 * window_seconds
+            while last_used:
+                key, used_at = next(iter(last_used.items()))
+                if used_at > cutoff:
+                    break
+                last_used.popitem(last=False)
+                self._windows.pop(key, None)
+    
+    # Exact sliding windows above this limit keep timestamps in a numpy buffer
+    NUMPY_WINDOW_THRESHOLD = 500
+    
+    # Scopes whose rules only apply when scope_key matches the request
+    KEYED_SCOPES = (RateLimitScope.USER, RateLimitScope.AGENT)
+    
+    def _index_rules(self):
+        """Rebuild the rule lookup by scope key and each rule's window plan."""
+        self._keyed_rules = {}
+        self._unkeyed_rules = []
+        self._rule_windows = {rule.id: self._plan_windows(rule) for rule in self.config.rules}
+        for position, rule in enumerate(self.config.rules):
+            if rule.scope in self.KEYED_SCOPES and rule.scope_key:
+                self._keyed_rules.setdefault((rule.scope, rule.scope_key), []).append((position, rule))
+            else:
+                self._unkeyed_rules.append((position, rule))
+    
+    @staticmethod
+    def _plan_windows(rule: RateLimitRule) -> Tuple[Tuple[str, int, int, str], ...]:
+        """(key suffix, window seconds, limit, message) for each request limit a rule sets."""
+        windows = []
+        if rule.requests_per_minute:
+            windows.append((":rpm", 60, rule.requests_per_minute, f"Rate limit exceeded: {rule.requests_per_minute}/min"))
+        if rule.requests_per_hour:
+            windows.append((":rph", 3600, rule.requests_per_hour, f"Rate limit exceeded: {rule.requests_per_hour}/hour"))
+        return tuple(windows)
+    
+    def _matching_rules(self, user_id: Optional[str], agent_id: Optional[str]) -> List[RateLimitRule]:
+        """Rules that apply to a request, in configuration order."""
+        if not self._keyed_rules:
+            return [rule for _, rule in self._unkeyed_rules]
+        matching = list(self._unkeyed_rules)
+        if user_id:
+            matching.extend(self._keyed_rules.get((RateLimitScope.USER, user_id), ()))
+        if agent_id:
+            matching.extend(self._keyed_rules.get((RateLimitScope.AGENT, agent_id), ()))
+        matching.sort(key=lambda entry: entry[0])
+        return [rule for _, rule in matching]
     
     def _get_limiter_key(
         self,
@@ -239,21 +572,19 @@ class RateLimiter(Capability):
         rule_id: Optional[str] = None
     ) -> str:
         """Generate a unique key for the limiter."""
-        parts = [scope.value]
-        
-        if scope == RateLimitScope.USER and user_id:
-            parts.append(user_id)
-        elif scope == RateLimitScope.IP and ip:
-            parts.append(ip)
-        elif scope == RateLimitScope.AGENT and agent_id:
-            parts.append(agent_id)
-        elif scope == RateLimitScope.ENDPOINT and endpoint:
-            parts.append(endpoint)
-        
-        if rule_id:
-            parts.append(rule_id)
+        if scope == RateLimitScope.USER:
+            scope_id = user_id
+        elif scope == RateLimitScope.IP:
+            scope_id = ip
+        elif scope == RateLimitScope.AGENT:
+            scope_id = agent_id
+        elif scope == RateLimitScope.ENDPOINT:
+            scope_id = endpoint
+        else:
+            scope_id = None
         
-        return ":".join(parts)
+        key = f"{scope.value}:{scope_id}" if scope_id else scope.value
+        return f"{key}:{rule_id}" if rule_id else key
     
     async def check(
         self,
@@ -265,7 +596,7 @@ class RateLimiter(Capability):
     ) -> RateLimitResult:
         """Check if request is allowed."""
         # Check custom rules first
-        for rule in self.config.rules:
+        for rule in self._matching_rules(user_id, agent_id):
             if not rule.enabled:
                 continue
             
@@ -306,20 +637,15 @@ class RateLimiter(Capability):
             rule.scope, user_id, ip, agent_id, endpoint, rule.id
         )
         
-        # Check request limits
-        if rule.requests_per_minute:
-            if not await self._check_window(key + ":rpm", 60, rule.requests_per_minute):
-                result.allowed = False
-                result.limit = rule.requests_per_minute
-                result.message = f"Rate limit exceeded: {rule.requests_per_minute}/min"
-                result.retry_after_seconds = rule.retry_after_seconds
-                return result
-        
-        if rule.requests_per_hour:
-            if not await self._check_window(key + ":rph", 3600, rule.requests_per_hour):
+        # Check request limits (planned once per rule when rules change)
+        windows = self._rule_windows.get(rule.id)
+        if windows is None:
+            windows = self._rule_windows[rule.id] = self._plan_windows(rule)
+        for suffix, window_seconds, limit, message in windows:
+            if not await self._check_window(key + suffix, window_seconds, limit, rule.strategy):
                 result.allowed = False
-                result.limit = rule.requests_per_hour
-                result.message = f"Rate limit exceeded: {rule.requests_per_hour}/hour"
+                result.limit = limit
+                result.message = message
                 result.retry_after_seconds = rule.retry_after_seconds
                 return result
         
@@ -367,7 +693,10 @@ class RateLimiter(Capability):
             allowed = await self._check_window(
                 window_key,
                 60,
-                self.config.default_requests_per_minute
+                self.config.default_requests_per_minute,
+                self.config.default_strategy,
+                approximate=True,
+                shared=True
             )
             
             if not allowed:
@@ -409,11 +738,43 @@ class RateLimiter(Capability):
         self,
         key: str,
         window_seconds: int,
-        max_requests: int
+        max_requests: int,
+        strategy: RateLimitStrategy = RateLimitStrategy.SLIDING_WINDOW,
+        approximate: bool = False,
+        shared: bool = False
     ) -> bool:
-        """Check sliding window limit."""
+        """
+        Check a request window limit.
+        
+        Fixed windows keep a single counter. Sliding windows keep exact
+        timestamps unless ``approximate`` is set (used for the high-volume
+        default limits), in which case a weighted two-window counter is used.
+        ``shared`` windows are kept in Redis when the redis backend is active.
+        """
         if key not in self._windows:
-            self._windows[key] = SlidingWindow(window_seconds, max_requests)
+            if shared and self._redis is not None:
+                self._windows[key] = RedisWindow(
+                    self._redis,
+                    self.config.redis_key_prefix + key,
+                    window_seconds,
+                    max_requests,
+                    sliding=strategy != RateLimitStrategy.FIXED_WINDOW,
+                    local_cache_seconds=self.config.redis_local_cache_ms / 1000
+                )
+            elif strategy == RateLimitStrategy.FIXED_WINDOW:
+                self._windows[key] = FixedWindow(window_seconds, max_requests)
+            elif strategy == RateLimitStrategy.SLIDING_WINDOW and approximate:
+                self._windows[key] = FixedWindow(window_seconds, max_requests, weighted=True)
+            elif max_requests > self.NUMPY_WINDOW_THRESHOLD:
+                self._windows[key] = NumpySlidingWindow(window_seconds, max_requests)
+            else:
+                self._windows[key] = SlidingWindow(window_seconds, max_requests)
+        
+        last_used = self._window_last_used.get(window_seconds)
+        if last_used is None:
+            last_used = self._window_last_used[window_seconds] = OrderedDict()
+        last_used[key] = time.monotonic()
+        last_used.move_to_end(key)
         
         window = self._windows[key]
         return await window.record()
@@ -426,11 +787,10 @@ class RateLimiter(Capability):
         tokens: int
     ) -> bool:
         """Check token bucket limit."""
-        if key not in self._buckets:
-            self._buckets[key] = TokenBucket(rate, capacity)
-        
-        bucket = self._buckets[key]
-        return await bucket.acquire(tokens)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket.try_acquire(tokens)
     
     async def record_request(
         self,
@@ -449,12 +809,14 @@ class RateLimiter(Capability):
     async def add_rule(self, rule: RateLimitRule):
         """Add a rate limit rule."""
         self.config.rules.append(rule)
+        self._index_rules()
     
     async def remove_rule(self, rule_id: str) -> bool:
         """Remove a rate limit rule."""
         for i, rule in enumerate(self.config.rules):
             if rule.id == rule_id:
                 del self.config.rules[i]
+                self._index_rules()
                 return True
         return False
     
@@ -7,12 +7,17 @@ and session lifecycle handling.
 import logging
 import uuid
 import asyncio
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+import heapq
+import time
+from collections import deque
+from itertools import islice
+from typing import Optional, Dict, Any, List, Deque, Set, Tuple, Annotated
+from datetime import datetime, timezone
 from enum import Enum
+from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
 
-from .base import Capability, CapabilityConfig
+from .base import Capability, CapabilityConfig, next_local_id
 
 logger = logging.getLogger(__name__)
 
@@ -25,17 +30,41 @@ class SessionStatus(str, Enum):
     CLOSED = "closed"
 
 
-class Message(BaseModel):
+@dataclass(slots=True)
+class Message:
     """A message in the conversation."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    role: str = Field(..., description="Role: user, assistant, system, tool")
-    content: str = Field(..., description="Message content")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    role: str
+    content: str
+    id: str = field(default_factory=next_local_id)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    metadata: Dict[str, Any] = field(default_factory=dict)
     
     # For tool messages
     tool_call_id: Optional[str] = None
     tool_name: Optional[str] = None
+    # Cached context-window entry; excluded when the owning Session is dumped
+    _context: Annotated[Optional[Dict[str, str]], Field(exclude=True)] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    def context_entry(self) -> Dict[str, str]:
+        """Get the cached {"role", "content"} dict used in LLM context windows."""
+        entry = self._context
+        if entry is None:
+            entry = self._context = {"role": self.role, "content": self.content}
+        return entry
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-friendly dictionary."""
+        return {
+            "id": self.id,
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp.isoformat(),
+            "metadata": self.metadata,
+            "tool_call_id": self.tool_call_id,
+            "tool_name": self.tool_name
+        }
 
 
 class Session(BaseModel):
@@ -50,9 +79,10 @@ class Session(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: Optional[datetime] = None
+    expires_at_epoch: Optional[float] = None
     
-    # Conversation
-    messages: List[Message] = Field(default_factory=list)
+    # Conversation (bounded by the manager's max_messages; oldest turns drop off)
+    messages: Deque[Message] = Field(default_factory=deque)
     
     # State
     state: Dict[str, Any] = Field(default_factory=dict)
@@ -65,6 +95,24 @@ class Session(BaseModel):
     message_count: int = 0
     token_count: int = 0
     
+    def model_post_init(self, __context: Any):
+        """Derive the epoch expiry when only expires_at was given."""
+        if self.expires_at_epoch is None and self.expires_at is not None:
+            self.sync_expiry()
+    
+    def __setattr__(self, name: str, value: Any):
+        """Set a field, keeping expires_at_epoch in step with expires_at."""
+        super().__setattr__(name, value)
+        if name == "expires_at":
+            self.sync_expiry()
+    
+    def sync_expiry(self):
+        """Recompute expires_at_epoch from expires_at (naive UTC)."""
+        if self.expires_at is None:
+            self.expires_at_epoch = None
+        else:
+            self.expires_at_epoch = self.expires_at.replace(tzinfo=timezone.utc).timestamp()
+    
     def add_message(self, role: str, content: str, **kwargs) -> Message:
         """Add a message to the session."""
         message = Message(role=role, content=content, **kwargs)
@@ -79,22 +127,23 @@ class Session(BaseModel):
         if roles:
             messages = [m for m in messages if m.role in roles]
         if limit:
-            messages = messages[-limit:]
-        return messages
+            tail = list(islice(reversed(messages), limit))
+            tail.reverse()
+            return tail
+        return list(messages)
     
     def get_context_window(self, max_messages: int = 20) -> List[Dict[str, str]]:
-        """Get messages formatted for LLM context."""
-        messages = self.get_messages(limit=max_messages)
-        return [{"role": m.role, "content": m.content} for m in messages]
+        """Get messages formatted for LLM context (entries are cached per message; treat as read-only)."""
+        return [m.context_entry() for m in self.get_messages(limit=max_messages)]
     
     def update_state(self, updates: Dict[str, Any]):
         """Update session state."""
         self.state.update(updates)
         self.updated_at = datetime.utcnow()
     
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """Check if session is expired."""
-        if self.expires_at and datetime.utcnow() > self.expires_at:
+        if self.expires_at_epoch is not None and (now or time.time()) >= self.expires_at_epoch:
             return True
         return self.status == SessionStatus.EXPIRED
 
@@ -105,6 +154,10 @@ class SessionConfig(CapabilityConfig):
     max_messages: int = Field(default=1000, description="Maximum messages per session")
     max_sessions: int = Field(default=10000, description="Maximum concurrent sessions")
     cleanup_interval_seconds: int = Field(default=300, description="Cleanup interval in seconds")
+    full_sweep_every: int = Field(
+        default=12, ge=0,
+        description="Every N cleanups also scan all sessions for an EXPIRED status set directly (0 disables)"
+    )
     persist_sessions: bool = Field(default=False, description="Persist sessions to storage")
     storage_backend: str = Field(default="memory", description="Storage backend: memory, redis, database")
 
@@ -119,7 +172,17 @@ class SessionManager(Capability):
     def __init__(self, config: Optional[SessionConfig] = None):
         super().__init__(config or SessionConfig())
         self.config: SessionConfig = self.config
+        # Not pre-sized: dict.clear() frees the table, and growth to max_sessions
+        # costs under a millisecond in total (amortized O(1) per insert)
         self._sessions: Dict[str, Session] = {}
+        # Session ids per user, so per-user listings skip unrelated sessions
+        self._by_user: Dict[str, Set[str]] = {}
+        # (expires_at_epoch, session_id) min-heap; entries go stale when a TTL changes
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Running totals for get_stats, kept in step by the index helpers and _set_status
+        self._active_sessions = 0
+        self._total_messages = 0
+        self._cleanup_runs = 0
         self._cleanup_task: Optional[asyncio.Task] = None
     
     async def _do_initialize(self):
@@ -137,6 +200,32 @@ class SessionManager(Capability):
             except asyncio.CancelledError:
                 pass
     
+    def _index_session(self, session: Session):
+        """Add a session to the secondary indexes and counters."""
+        if session.status == SessionStatus.ACTIVE:
+            self._active_sessions += 1
+        self._total_messages += session.message_count
+        if session.user_id:
+            self._by_user.setdefault(session.user_id, set()).add(session.id)
+    
+    def _unindex_session(self, session: Session):
+        """Remove a session from the secondary indexes and counters."""
+        if session.status == SessionStatus.ACTIVE:
+            self._active_sessions -= 1
+        self._total_messages -= session.message_count
+        if session.user_id:
+            ids = self._by_user.get(session.user_id)
+            if ids is not None:
+                ids.discard(session.id)
+                if not ids:
+                    del self._by_user[session.user_id]
+    
+    def _set_status(self, session: Session, status: SessionStatus):
+        """Change a session's status, keeping the active counter in step."""
+        was_active = session.status == SessionStatus.ACTIVE
+        session.status = status
+        self._active_sessions += (status == SessionStatus.ACTIVE) - was_active
+    
     async def _cleanup_loop(self):
         """Background task to clean up expired sessions."""
         while True:
@@ -158,22 +247,31 @@ class SessionManager(Capability):
     ) -> Session:
         """Create a new session."""
         if len(self._sessions) >= self.config.max_sessions:
-            await self.cleanup_expired()
+            await self.cleanup_expired(full=True)
             if len(self._sessions) >= self.config.max_sessions:
                 raise RuntimeError("Maximum sessions reached")
         
         ttl = ttl_minutes or self.config.default_ttl_minutes
-        expires_at = datetime.utcnow() + timedelta(minutes=ttl) if ttl > 0 else None
+        if ttl > 0:
+            expires_at_epoch = time.time() + ttl * 60
+            expires_at = datetime.utcfromtimestamp(expires_at_epoch)
+        else:
+            expires_at_epoch = expires_at = None
         
         session = Session(
             user_id=user_id,
             agent_id=agent_id,
             graph_id=graph_id,
             expires_at=expires_at,
+            expires_at_epoch=expires_at_epoch,
+            messages=deque(maxlen=self.config.max_messages),
             metadata=metadata or {}
         )
         
         self._sessions[session.id] = session
+        self._index_session(session)
+        if expires_at_epoch is not None:
+            heapq.heappush(self._expiry_heap, (expires_at_epoch, session.id))
         logger.info(f"Created session {session.id} for user {user_id}")
         return session
     
@@ -181,7 +279,7 @@ class SessionManager(Capability):
         """Get a session by ID."""
         session = self._sessions.get(session_id)
         if session and session.is_expired():
-            session.status = SessionStatus.EXPIRED
+            self._set_status(session, SessionStatus.EXPIRED)
         return session
     
     async def update_session(self, session_id: str, updates: Dict[str, Any]) -> Optional[Session]:
@@ -190,9 +288,16 @@ class SessionManager(Capability):
         if not session:
             return None
         
+        self._unindex_session(session)
         for key, value in updates.items():
             if hasattr(session, key):
                 setattr(session, key, value)
+        if "expires_at" in updates:
+            if session.expires_at_epoch is not None:
+                heapq.heappush(self._expiry_heap, (session.expires_at_epoch, session.id))
+        if session.status == SessionStatus.EXPIRED:
+            heapq.heappush(self._expiry_heap, (time.time(), session.id))
+        self._index_session(session)
         
         session.updated_at = datetime.utcnow()
         return session
@@ -205,29 +310,33 @@ class SessionManager(Capability):
         **kwargs
     ) -> Optional[Message]:
         """Add a message to a session."""
-        session = await self.get_session(session_id)
-        if not session or session.status != SessionStatus.ACTIVE:
+        # Inlined get_session: this runs once per turn (or per streamed chunk)
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.is_expired():
+            self._set_status(session, SessionStatus.EXPIRED)
+            return None
+        if session.status != SessionStatus.ACTIVE:
             return None
         
-        if session.message_count >= self.config.max_messages:
-            # Remove oldest messages
-            session.messages = session.messages[-(self.config.max_messages - 1):]
-        
+        self._total_messages += 1
         return session.add_message(role, content, **kwargs)
     
     async def close_session(self, session_id: str) -> bool:
         """Close a session."""
         session = self._sessions.get(session_id)
         if session:
-            session.status = SessionStatus.CLOSED
+            self._set_status(session, SessionStatus.CLOSED)
             logger.info(f"Closed session {session_id}")
             return True
         return False
     
     async def delete_session(self, session_id: str) -> bool:
         """Delete a session."""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
+        session = self._sessions.pop(session_id, None)
+        if session:
+            self._unindex_session(session)
             logger.info(f"Deleted session {session_id}")
             return True
         return False
@@ -239,35 +348,53 @@ class SessionManager(Capability):
         limit: int = 100
     ) -> List[Session]:
         """List sessions with optional filtering."""
-        sessions = list(self._sessions.values())
-        
         if user_id:
-            sessions = [s for s in sessions if s.user_id == user_id]
+            ids = self._by_user.get(user_id, ())
+            sessions = [self._sessions[sid] for sid in ids]
+        else:
+            sessions = self._sessions.values()
+        
         if status:
             sessions = [s for s in sessions if s.status == status]
         
-        # Sort by updated_at descending
-        sessions.sort(key=lambda s: s.updated_at, reverse=True)
-        return sessions[:limit]
-    
-    async def cleanup_expired(self) -> int:
-        """Clean up expired sessions."""
-        expired = [sid for sid, s in self._sessions.items() if s.is_expired()]
-        for sid in expired:
-            del self._sessions[sid]
+        # Most recently updated first; only the top `limit` are ordered
+        return heapq.nlargest(limit, sessions, key=lambda s: s.updated_at)
+    
+    async def cleanup_expired(self, full: bool = False) -> int:
+        """Clean up expired sessions (``full`` also scans for sessions marked EXPIRED directly)."""
+        now = time.time()
+        heap = self._expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            _, sid = heapq.heappop(heap)
+            session = self._sessions.get(sid)
+            # Skip deleted sessions and stale entries left behind by a TTL extension
+            if session is not None and session.is_expired(now):
+                self._unindex_session(self._sessions.pop(sid))
+                expired += 1
+        
+        # A status assigned without going through the manager has no due heap entry
+        # (and bypasses the counters), so periodically scan for it and resync
+        self._cleanup_runs += 1
+        every = self.config.full_sweep_every
+        if full or (every and self._cleanup_runs % every == 0):
+            marked = [sid for sid, s in self._sessions.items() if s.status == SessionStatus.EXPIRED]
+            for sid in marked:
+                self._unindex_session(self._sessions.pop(sid))
+            expired += len(marked)
+            self._active_sessions = sum(
+                1 for s in self._sessions.values() if s.status == SessionStatus.ACTIVE
+            )
         
         if expired:
-            logger.info(f"Cleaned up {len(expired)} expired sessions")
-        return len(expired)
+            logger.info(f"Cleaned up {expired} expired sessions")
+        return expired
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get session statistics."""
-        active = sum(1 for s in self._sessions.values() if s.status == SessionStatus.ACTIVE)
-        total_messages = sum(s.message_count for s in self._sessions.values())
-        
         return {
             "total_sessions": len(self._sessions),
-            "active_sessions": active,
-            "total_messages": total_messages,
+            "active_sessions": self._active_sessions,
+            "total_messages": self._total_messages,
             "max_sessions": self.config.max_sessions
         }
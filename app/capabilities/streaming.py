@@ -6,17 +6,39 @@ event-driven architecture.
 """
 import logging
 import asyncio
+import time
 import uuid
 import json
-from typing import Optional, Dict, Any, List, AsyncGenerator, Callable, Awaitable
+from collections import deque
+from typing import Optional, Dict, Any, List, AsyncGenerator, Callable, Awaitable, Deque, Set
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
+from pydantic import Field
 
-from .base import Capability, CapabilityConfig
+from .base import Capability, CapabilityConfig, next_local_id
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Formatted UTC prefix for the current second, shared by every event in that second
+_ts_second = -1
+_ts_prefix = ""
+
+
+def _iso_timestamp(ts: float) -> str:
+    """Format an epoch timestamp as a naive UTC ISO-8601 string."""
+    global _ts_second, _ts_prefix
+    second = int(ts)
+    if second != _ts_second:
+        _ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _ts_second = second
+    return f"{_ts_prefix}.{int((ts - second) * 1e6):06d}"
+
 
 class StreamEventType(str, Enum):
     """Types of stream events."""
@@ -29,13 +51,14 @@ class StreamEventType(str, Enum):
     END = "end"
 
 
-class StreamEvent(BaseModel):
+@dataclass(slots=True)
+class StreamEvent:
     """A streaming event."""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     stream_id: str
     event_type: StreamEventType
     data: Any = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    id: str = field(default_factory=next_local_id)
+    timestamp: float = field(default_factory=time.time)
     sequence: int = 0
     
     # For tokens
@@ -49,7 +72,31 @@ class StreamEvent(BaseModel):
     # For errors
     error: Optional[str] = None
     
-    def to_sse(self) -> str:
+    def reset(
+        self,
+        stream_id: str,
+        event_type: StreamEventType,
+        sequence: int,
+        data: Any = None,
+        token: Optional[str] = None,
+        tool_name: Optional[str] = None,
+        tool_args: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """Reinitialize a recycled event in place."""
+        self.stream_id = stream_id
+        self.event_type = event_type
+        self.data = data
+        self.id = next_local_id()
+        self.timestamp = time.time()
+        self.sequence = sequence
+        self.token = token
+        self.tokens_so_far = 0
+        self.tool_name = tool_name
+        self.tool_args = tool_args
+        self.error = error
+    
+    def to_sse(self) -> bytes:
         """Convert to Server-Sent Event format."""
         data = {
             "id": self.id,
@@ -58,7 +105,7 @@ class StreamEvent(BaseModel):
             "data": self.data,
             "token": self.token,
             "tokens_so_far": self.tokens_so_far,
-            "timestamp": self.timestamp.isoformat()
+            "timestamp": _iso_timestamp(self.timestamp)
         }
         if self.error:
             data["error"] = self.error
@@ -66,7 +113,10 @@ class StreamEvent(BaseModel):
             data["tool_name"] = self.tool_name
             data["tool_args"] = self.tool_args
         
-        return f"data: {json.dumps(data)}\n\n"
+        if orjson is not None:
+            # Non-str keys in data/tool_args are stringified, as json.dumps does
+            return b"data: " + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+        return f"data: {json.dumps(data)}\n\n".encode()
 
 
 class StreamConfig(CapabilityConfig):
@@ -75,20 +125,48 @@ class StreamConfig(CapabilityConfig):
     timeout_seconds: int = Field(default=300, description="Stream timeout")
     heartbeat_interval: int = Field(default=15, description="Heartbeat interval in seconds")
     max_concurrent_streams: int = Field(default=1000, description="Max concurrent streams")
+    event_pool_size: int = Field(
+        default=0,
+        description="Events recycled per stream after sse_events serializes them (0 disables; "
+                    "only enable when listeners and emit() callers do not keep event references)"
+    )
+    coalesce_ms: int = Field(
+        default=0,
+        description="Batch SSE frames emitted within this many milliseconds into one chunk (0 disables)"
+    )
+    coalesce_max_events: int = Field(default=32, ge=1, description="Maximum SSE frames per coalesced chunk")
+    listener_mode: str = Field(
+        default="sequential",
+        description="How emit() runs listeners: sequential, parallel (gather), background (fire-and-forget tasks)"
+    )
+
+
+@dataclass(slots=True)
+class StreamCounters:
+    """Running totals shared by a manager and its streams."""
+    active: int = 0
+    tokens: int = 0
 
 
 class Stream:
     """A streaming response handler."""
     
-    def __init__(self, stream_id: str, config: StreamConfig):
+    def __init__(self, stream_id: str, config: StreamConfig, counters: Optional[StreamCounters] = None):
         self.id = stream_id
         self.config = config
+        self._counters = counters
         self.created_at = datetime.utcnow()
         self.sequence = 0
-        self._buffer: asyncio.Queue = asyncio.Queue(maxsize=config.buffer_size)
+        # Single consumer: a deque plus a wake-up event is all events() needs
+        self._buffer: Deque[StreamEvent] = deque()
+        self._not_empty = asyncio.Event()
         self._closed = False
+        self._end_event: Optional[StreamEvent] = None
         self._listeners: List[Callable[[StreamEvent], Awaitable[None]]] = []
-        self._accumulated_text = ""
+        self._event_pool: List[StreamEvent] = []
+        # Strong refs to background listener tasks so they are not collected mid-flight
+        self._listener_tasks: Set[asyncio.Task] = set()
+        self._accumulated_tokens: List[str] = []
         self._token_count = 0
     
     @property
@@ -97,7 +175,11 @@ class Stream:
     
     @property
     def accumulated_text(self) -> str:
-        return self._accumulated_text
+        tokens = self._accumulated_tokens
+        if len(tokens) > 1:
+            # Collapse to a single part so repeated reads don't re-join
+            tokens[:] = ["".join(tokens)]
+        return tokens[0] if tokens else ""
     
     @property
     def token_count(self) -> int:
@@ -105,38 +187,76 @@ class Stream:
     
     async def emit(self, event_type: StreamEventType, **kwargs) -> StreamEvent:
         """Emit a stream event."""
+        event = self._enqueue(event_type, **kwargs)
+        
+        # Notify listeners
+        if self._listeners:
+            await self._notify(event)
+        
+        return event
+    
+    def _enqueue(self, event_type: StreamEventType, **kwargs) -> StreamEvent:
+        """Build the next event and append it to the buffer."""
         if self._closed and event_type != StreamEventType.END:
             raise RuntimeError("Stream is closed")
         
         self.sequence += 1
-        event = StreamEvent(
-            stream_id=self.id,
-            event_type=event_type,
-            sequence=self.sequence,
-            **kwargs
-        )
+        if self._event_pool:
+            event = self._event_pool.pop()
+            event.reset(self.id, event_type, self.sequence, **kwargs)
+        else:
+            event = StreamEvent(
+                stream_id=self.id,
+                event_type=event_type,
+                sequence=self.sequence,
+                **kwargs
+            )
         
         # Accumulate text
         if event_type == StreamEventType.TOKEN and event.token:
-            self._accumulated_text += event.token
+            self._accumulated_tokens.append(event.token)
             self._token_count += 1
             event.tokens_so_far = self._token_count
+            if self._counters is not None:
+                self._counters.tokens += 1
         
         # Add to buffer
-        try:
-            self._buffer.put_nowait(event)
-        except asyncio.QueueFull:
+        if 0 < self.config.buffer_size <= len(self._buffer):
             logger.warning(f"Stream {self.id} buffer full, dropping event")
-        
-        # Notify listeners
-        for listener in self._listeners:
-            try:
-                await listener(event)
-            except Exception as e:
-                logger.error(f"Stream listener error: {e}")
-        
+        else:
+            self._buffer.append(event)
+            self._not_empty.set()
         return event
     
+    async def _notify(self, event: StreamEvent):
+        """Dispatch an event to listeners according to listener_mode."""
+        mode = self.config.listener_mode
+        if mode == "parallel":
+            results = await asyncio.gather(
+                *(listener(event) for listener in self._listeners),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Stream listener error: {result}")
+        elif mode == "background":
+            for listener in self._listeners:
+                task = asyncio.create_task(listener(event))
+                self._listener_tasks.add(task)
+                task.add_done_callback(self._listener_done)
+        else:
+            for listener in self._listeners:
+                try:
+                    await listener(event)
+                except Exception as e:
+                    logger.error(f"Stream listener error: {e}")
+    
+    def _listener_done(self, task: asyncio.Task):
+        """Release a finished background listener task and log its failure."""
+        self._listener_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Stream listener error: {task.exception()}")
+    
     async def emit_token(self, token: str) -> StreamEvent:
         """Emit a token event."""
         return await self.emit(StreamEventType.TOKEN, token=token)
@@ -158,15 +278,24 @@ class Stream:
         return await self.emit(StreamEventType.START)
     
     async def end(self) -> StreamEvent:
-        """End the stream."""
-        event = await self.emit(
+        """End the stream; repeated or concurrent calls return the same END event."""
+        if self._end_event is not None:
+            return self._end_event
+        
+        # Enqueue and close synchronously so no other caller can slip in a second END
+        event = self._end_event = self._enqueue(
             StreamEventType.END,
             data={
                 "total_tokens": self._token_count,
-                "accumulated_text": self._accumulated_text
+                "accumulated_text": self.accumulated_text
             }
         )
         self._closed = True
+        if self._counters is not None:
+            self._counters.active -= 1
+        
+        if self._listeners:
+            await self._notify(event)
         return event
     
     def add_listener(self, listener: Callable[[StreamEvent], Awaitable[None]]):
@@ -180,23 +309,87 @@ class Stream:
     
     async def events(self) -> AsyncGenerator[StreamEvent, None]:
         """Iterate over stream events."""
-        while not self._closed or not self._buffer.empty():
-            try:
-                event = await asyncio.wait_for(
-                    self._buffer.get(),
-                    timeout=self.config.timeout_seconds
-                )
-                yield event
-                if event.event_type == StreamEventType.END:
+        buffer = self._buffer
+        while not self._closed or buffer:
+            if not buffer:
+                self._not_empty.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._not_empty.wait(),
+                        timeout=self.config.timeout_seconds
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Stream {self.id} timed out")
                     break
-            except asyncio.TimeoutError:
-                logger.warning(f"Stream {self.id} timed out")
+                continue
+            event = buffer.popleft()
+            yield event
+            if event.event_type == StreamEventType.END:
                 break
     
-    async def sse_events(self) -> AsyncGenerator[str, None]:
+    def _recycle(self, event: StreamEvent):
+        """Return a serialized event to the pool if there is room."""
+        if event is not self._end_event and len(self._event_pool) < self.config.event_pool_size:
+            self._event_pool.append(event)
+    
+    async def sse_events(self) -> AsyncGenerator[bytes, None]:
         """Iterate over events in SSE format."""
+        if self.config.coalesce_ms > 0:
+            async for chunk in self._coalesced_sse_events():
+                yield chunk
+            return
         async for event in self.events():
             yield event.to_sse()
+            self._recycle(event)
+    
+    async def _coalesced_sse_events(self) -> AsyncGenerator[bytes, None]:
+        """Yield SSE frames batched per coalesce window, flushing early at coalesce_max_events."""
+        loop = asyncio.get_running_loop()
+        window = self.config.coalesce_ms / 1000
+        max_events = self.config.coalesce_max_events
+        buffer = self._buffer
+        batch = bytearray()
+        count = 0
+        flush_at: Optional[float] = None
+        
+        while True:
+            if buffer:
+                event = buffer.popleft()
+                batch += event.to_sse()
+                count += 1
+                self._recycle(event)
+                if event.event_type == StreamEventType.END:
+                    break
+                if flush_at is None:
+                    flush_at = loop.time() + window
+                if count >= max_events:
+                    yield bytes(batch)
+                    batch.clear()
+                    count = 0
+                    flush_at = None
+                continue
+            
+            if self._closed:
+                break
+            
+            timeout = self.config.timeout_seconds if flush_at is None else flush_at - loop.time()
+            if timeout > 0:
+                self._not_empty.clear()
+                try:
+                    await asyncio.wait_for(self._not_empty.wait(), timeout=timeout)
+                    continue
+                except asyncio.TimeoutError:
+                    if flush_at is None:
+                        logger.warning(f"Stream {self.id} timed out")
+                        break
+            
+            yield bytes(batch)
+            batch.clear()
+            count = 0
+            flush_at = None
+        
+        if batch:
+            yield bytes(batch)
 
 
 class StreamingManager(Capability):
@@ -210,22 +403,35 @@ class StreamingManager(Capability):
         super().__init__(config or StreamConfig())
         self.config: StreamConfig = self.config
         self._streams: Dict[str, Stream] = {}
+        self._counters = StreamCounters()
     
     async def _do_initialize(self):
         """Initialize streaming manager."""
         logger.info("Streaming manager initialized")
     
+    def _forget(self, stream: Stream):
+        """Take a stream that is leaving the registry out of the counters."""
+        self._counters.tokens -= stream.token_count
+        if not stream.is_closed:
+            self._counters.active -= 1
+        # Detach so a replaced stream that keeps emitting no longer moves the totals
+        stream._counters = None
+    
     async def _do_shutdown(self):
         """Shutdown all streams."""
         for stream in list(self._streams.values()):
             if not stream.is_closed:
                 await stream.end()
         self._streams.clear()
+        self._counters.active = self._counters.tokens = 0
     
     async def create_stream(self, stream_id: Optional[str] = None) -> Stream:
         """Create a new stream."""
         if len(self._streams) >= self.config.max_concurrent_streams:
             # Clean up closed streams
+            for s in self._streams.values():
+                if s.is_closed:
+                    self._forget(s)
             self._streams = {
                 sid: s for sid, s in self._streams.items() 
                 if not s.is_closed
@@ -234,8 +440,12 @@ class StreamingManager(Capability):
                 raise RuntimeError("Maximum concurrent streams reached")
         
         stream_id = stream_id or str(uuid.uuid4())
-        stream = Stream(stream_id, self.config)
+        replaced = self._streams.get(stream_id)
+        if replaced is not None:
+            self._forget(replaced)
+        stream = Stream(stream_id, self.config, self._counters)
         self._streams[stream_id] = stream
+        self._counters.active += 1
         
         logger.debug(f"Created stream {stream_id}")
         return stream
@@ -258,6 +468,7 @@ class StreamingManager(Capability):
             stream = self._streams[stream_id]
             if not stream.is_closed:
                 await stream.end()
+            self._forget(stream)
             del self._streams[stream_id]
             return True
         return False
@@ -278,12 +489,9 @@ class StreamingManager(Capability):
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get streaming statistics."""
-        active = sum(1 for s in self._streams.values() if not s.is_closed)
-        total_tokens = sum(s.token_count for s in self._streams.values())
-        
         return {
             "total_streams": len(self._streams),
-            "active_streams": active,
-            "total_tokens_streamed": total_tokens,
+            "active_streams": self._counters.active,
+            "total_tokens_streamed": self._counters.tokens,
             "max_concurrent": self.config.max_concurrent_streams
         }
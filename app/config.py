@@ -3,10 +3,19 @@ Configuration settings for the ADK platform.
 """
 import os
 import re
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field, model_validator
 from typing import Optional, Any
 
+# ${VAR_NAME} (group 1) or $VAR_NAME (group 2)
+_ENV_PATTERN = re.compile(r'\$\{([^}]+)\}|\$([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def _substitute_env(match: re.Match) -> str:
+    """Return the environment value for a reference, leaving unset/empty ones untouched."""
+    return os.getenv(match.group(1) or match.group(2), '') or match.group(0)
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -52,30 +61,16 @@ class Settings(BaseSettings):
     def resolve_env_variables(self) -> 'Settings':
         """Resolve ${VARIABLE} references in all string fields after loading."""
         for field_name, field_value in self.__dict__.items():
-            if isinstance(field_value, str):
-                resolved = self._resolve_string(field_value)
+            if not isinstance(field_value, str) or '$' not in field_value:
+                continue
+            resolved = self._resolve_string(field_value)
+            if resolved != field_value:
                 setattr(self, field_name, resolved)
         return self
     
     def _resolve_string(self, value: str) -> str:
         """Resolve ${VAR} and $VAR references in a string."""
-        result = value
-        
-        # Match ${VAR_NAME}
-        pattern_braces = r'\$\{([^}]+)\}'
-        for var_name in re.findall(pattern_braces, result):
-            env_value = os.getenv(var_name, '')
-            if env_value:
-                result = result.replace(f'${{{var_name}}}', env_value)
-        
-        # Match $VAR_NAME
-        pattern_simple = r'\$([A-Za-z_][A-Za-z0-9_]*)'
-        for var_name in re.findall(pattern_simple, result):
-            env_value = os.getenv(var_name, '')
-            if env_value:
-                result = result.replace(f'${var_name}', env_value)
-        
-        return result
+        return _ENV_PATTERN.sub(_substitute_env, value)
     
     class Config:
         env_file = ".env"
@@ -84,11 +79,17 @@ class Settings(BaseSettings):
         extra = "ignore"  # Ignore extra fields from .env file
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Get application settings singleton."""
     return Settings()
 
 
+def reset_settings() -> None:
+    """Drop the cached settings so the next get_settings() re-reads the environment."""
+    get_settings.cache_clear()
+
+
 def ensure_directories(settings: Settings) -> None:
     """Ensure all required directories exist."""
     directories = [
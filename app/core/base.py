@@ -11,19 +11,28 @@ This establishes standardization across the platform for:
 - Observability (logging, metrics, tracing)
 - Configuration validation
 """
+import asyncio
 import logging
-import uuid
+import re
+import time
+from array import array
+from os import urandom
+from types import MappingProxyType
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List, Type, TypeVar, Generic, Callable, Set
+from typing import Optional, Dict, Any, List, Type, TypeVar, Generic, Callable, Set, Tuple, DefaultDict, Mapping
 from datetime import datetime, timezone
 from enum import Enum
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from functools import wraps
+from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound='ADKComponentConfig')
 
+# Component IDs: alphanumeric, hyphens, underscores
+_ID_RE_MATCH = re.compile(r'\A[A-Za-z0-9_-]+\Z').match
+
 
 class ComponentType(str, Enum):
     """Types of ADK components."""
@@ -50,6 +59,24 @@ class ComponentStatus(str, Enum):
     ARCHIVED = "archived"
 
 
+# Every component type, in declaration order
+_COMPONENT_TYPES: Tuple[ComponentType, ...] = tuple(ComponentType)
+
+# ObservabilityMixin.log level names
+_LOG_LEVELS: Dict[str, int] = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "fatal": logging.CRITICAL,
+}
+
+# Statuses in which a component can serve requests
+_READY_STATUSES = frozenset((ComponentStatus.READY, ComponentStatus.ACTIVE))
+
+
 class ADKComponentConfig(BaseModel):
     """
     Base configuration for all ADK components.
@@ -88,19 +115,15 @@ class ADKComponentConfig(BaseModel):
     updated_at: Optional[datetime] = Field(default=None, description="Last update timestamp")
     created_by: Optional[str] = Field(default=None, description="Creator user ID")
     
-    class Config:
-        extra = "allow"
-        use_enum_values = True
+    model_config = ConfigDict(extra="allow", use_enum_values=True, validate_assignment=False)
     
     @field_validator('id')
     @classmethod
     def validate_id(cls, v: str) -> str:
         """Validate component ID format."""
-        if not v or not v.strip():
-            raise ValueError("ID cannot be empty")
-        # Allow alphanumeric, hyphens, underscores
-        import re
-        if not re.match(r'^[a-zA-Z0-9_-]+$', v):
+        if not _ID_RE_MATCH(v):
+            if not v.strip():
+                raise ValueError("ID cannot be empty")
             raise ValueError("ID must be alphanumeric with hyphens/underscores only")
         return v
     
@@ -124,11 +147,28 @@ class LifecycleMixin:
     Lifecycle: draft -> initializing -> ready -> active -> shutdown
     """
     
-    _status: ComponentStatus = ComponentStatus.DRAFT
-    _initialized_at: Optional[datetime] = None
-    _shutdown_at: Optional[datetime] = None
-    _error: Optional[str] = None
-    _error_count: int = 0
+    # State lives in the host class's slots (see ADKComponent) or __dict__
+    __slots__ = ()
+    
+    _status: ComponentStatus
+    _initialized_at: Optional[datetime]
+    _initialized_at_iso: Optional[str]
+    _initialized_monotonic: Optional[float]
+    _shutdown_at: Optional[datetime]
+    _shutdown_at_iso: Optional[str]
+    _error: Optional[str]
+    _error_count: int
+    
+    def _init_lifecycle(self):
+        """Set per-instance lifecycle state; call from the host class __init__."""
+        self._status = ComponentStatus.DRAFT
+        self._initialized_at = None
+        self._initialized_at_iso = None
+        self._initialized_monotonic = None
+        self._shutdown_at = None
+        self._shutdown_at_iso = None
+        self._error = None
+        self._error_count = 0
     
     @property
     def status(self) -> ComponentStatus:
@@ -136,7 +176,7 @@ class LifecycleMixin:
     
     @property
     def is_ready(self) -> bool:
-        return self._status in (ComponentStatus.READY, ComponentStatus.ACTIVE)
+        return self._status in _READY_STATUSES
     
     @property
     def is_active(self) -> bool:
@@ -163,6 +203,9 @@ class LifecycleMixin:
             
             self._status = ComponentStatus.READY
             self._initialized_at = datetime.now(timezone.utc)
+            # Formatted once here; get_info() is polled far more often than this changes
+            self._initialized_at_iso = self._initialized_at.isoformat()
+            self._initialized_monotonic = time.monotonic()
             logger.info(f"Component initialized: {getattr(self, 'name', 'unknown')}")
             return True
             
@@ -222,6 +265,7 @@ class LifecycleMixin:
             await self._on_shutdown()
             self._status = ComponentStatus.SHUTDOWN
             self._shutdown_at = datetime.now(timezone.utc)
+            self._shutdown_at_iso = self._shutdown_at.isoformat()
             logger.info(f"Component shutdown: {getattr(self, 'name', 'unknown')}")
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
@@ -249,8 +293,15 @@ class ValidationMixin:
     Mixin providing validation capabilities.
     """
     
-    _validation_errors: List[str] = []
-    _validation_warnings: List[str] = []
+    __slots__ = ()
+    
+    _validation_errors: List[str]
+    _validation_warnings: List[str]
+    
+    def _init_validation(self):
+        """Set per-instance validation state; call from the host class __init__."""
+        self._validation_errors = []
+        self._validation_warnings = []
     
     def validate(self) -> bool:
         """
@@ -281,12 +332,12 @@ class ValidationMixin:
         self._validation_warnings.append(warning)
     
     @property
-    def validation_errors(self) -> List[str]:
-        return self._validation_errors.copy()
+    def validation_errors(self) -> Tuple[str, ...]:
+        return tuple(self._validation_errors)
     
     @property
-    def validation_warnings(self) -> List[str]:
-        return self._validation_warnings.copy()
+    def validation_warnings(self) -> Tuple[str, ...]:
+        return tuple(self._validation_warnings)
     
     @property
     def is_valid(self) -> bool:
@@ -298,6 +349,8 @@ class SecurityMixin:
     Mixin providing security and access control.
     """
     
+    __slots__ = ()
+    
     def check_access(
         self,
         user_id: Optional[str] = None,
@@ -322,18 +375,16 @@ class SecurityMixin:
         if is_admin:
             return True, None
         
-        # Check groups
+        # Check groups (hashed lookup: O(allowed + groups) rather than their product)
         allowed_groups = getattr(config, 'allowed_groups', [])
         if allowed_groups:
-            groups = groups or []
-            if not any(g in allowed_groups for g in groups):
+            if not groups or frozenset(allowed_groups).isdisjoint(groups):
                 return False, f"Required group: {allowed_groups}"
         
         # Check roles
         allowed_roles = getattr(config, 'allowed_roles', [])
         if allowed_roles:
-            roles = roles or []
-            if not any(r in allowed_roles for r in roles):
+            if not roles or frozenset(allowed_roles).isdisjoint(roles):
                 return False, f"Required role: {allowed_roles}"
         
         return True, None
@@ -343,19 +394,71 @@ class SecurityMixin:
         return permission in user_permissions
 
 
+class MetricSeries:
+    """Recorded points for one metric, stored column-wise (values, ns timestamps, tags)."""
+    
+    __slots__ = ("values", "ts_ns", "tags", "_points")
+    
+    def __init__(self):
+        self.values: List[Any] = []
+        self.ts_ns = array('q')
+        self.tags: List[Optional[Dict[str, str]]] = []
+        # Materialized points per formatted flag; points are only appended, so a
+        # cached tuple stays valid and is extended with the points recorded since
+        self._points: Dict[bool, Tuple[Dict[str, Any], ...]] = {}
+    
+    def append(self, value: Any, ts_ns: int, tags: Optional[Dict[str, str]]):
+        """Record one point."""
+        self.values.append(value)
+        self.ts_ns.append(ts_ns)
+        self.tags.append(tags)
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def to_points(self, formatted: bool = True) -> Tuple[Dict[str, Any], ...]:
+        """Materialize the points as dicts, with ISO timestamps when formatted."""
+        points = self._points.get(formatted, ())
+        start = len(points)
+        if start == len(self.values):
+            return points
+        new = zip(self.values[start:], self.ts_ns[start:], self.tags[start:])
+        if formatted:
+            points += tuple(
+                {
+                    "value": value,
+                    "timestamp": datetime.fromtimestamp(ts / 1e9, timezone.utc).isoformat(),
+                    "tags": tags or {}
+                }
+                for value, ts, tags in new
+            )
+        else:
+            points += tuple({"value": value, "ts_ns": ts, "tags": tags or {}} for value, ts, tags in new)
+        self._points[formatted] = points
+        return points
+
+
 class ObservabilityMixin:
     """
     Mixin providing observability (logging, metrics, tracing).
     """
     
-    _metrics: Dict[str, Any] = {}
-    _trace_id: Optional[str] = None
-    _span_id: Optional[str] = None
+    __slots__ = ()
+    
+    _metrics: Dict[str, Any]
+    _trace_id: Optional[str]
+    _span_id: Optional[str]
+    
+    def _init_observability(self):
+        """Set per-instance metrics and trace state; call from the host class __init__."""
+        self._metrics = {}
+        self._trace_id = None
+        self._span_id = None
     
     def set_trace_context(self, trace_id: str, span_id: Optional[str] = None):
         """Set tracing context."""
         self._trace_id = trace_id
-        self._span_id = span_id or str(uuid.uuid4())[:8]
+        self._span_id = span_id or urandom(4).hex()
     
     def get_trace_context(self) -> Dict[str, Optional[str]]:
         """Get current trace context."""
@@ -366,13 +469,10 @@ class ObservabilityMixin:
     
     def record_metric(self, name: str, value: Any, tags: Optional[Dict[str, str]] = None):
         """Record a metric value."""
-        if name not in self._metrics:
-            self._metrics[name] = []
-        self._metrics[name].append({
-            "value": value,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "tags": tags or {}
-        })
+        series = self._metrics.get(name)
+        if series is None:
+            series = self._metrics[name] = MetricSeries()
+        series.append(value, time.time_ns(), tags)
     
     def increment_counter(self, name: str, value: int = 1):
         """Increment a counter metric."""
@@ -380,9 +480,12 @@ class ObservabilityMixin:
             self._metrics[name] = 0
         self._metrics[name] += value
     
-    def get_metrics(self) -> Dict[str, Any]:
-        """Get all recorded metrics."""
-        return self._metrics.copy()
+    def get_metrics(self, formatted: bool = True) -> Mapping[str, Any]:
+        """Get a read-only view of all recorded metrics; formatted=False gives raw ts_ns in place of ISO timestamps."""
+        return MappingProxyType({
+            name: values.to_points(formatted) if isinstance(values, MetricSeries) else values
+            for name, values in self._metrics.items()
+        })
     
     def clear_metrics(self):
         """Clear all metrics."""
@@ -390,14 +493,22 @@ class ObservabilityMixin:
     
     def log(self, level: str, message: str, **kwargs):
         """Log with component context."""
+        level = level.lower()
+        levelno = _LOG_LEVELS.get(level)
+        # Skip building the context for records the logger would drop
+        if levelno is not None and not logger.isEnabledFor(levelno):
+            return
         extra = {
             "component": getattr(self, 'name', 'unknown'),
             "component_type": getattr(self, 'component_type', 'unknown'),
             "trace_id": self._trace_id,
             **kwargs
         }
-        log_fn = getattr(logger, level.lower(), logger.info)
-        log_fn(message, extra=extra)
+        if levelno is not None:
+            logger.log(levelno, message, extra=extra)
+        else:
+            log_fn = getattr(logger, level, logger.info)
+            log_fn(message, extra=extra)
 
 
 class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, ObservabilityMixin):
@@ -426,6 +537,16 @@ class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, Observab
     # Class-level attributes (override in subclass)
     component_type: ComponentType = ComponentType.PLUGIN
     
+    # Own state plus the mixins' state (the mixins declare empty slots)
+    __slots__ = (
+        "config", "_id", "_name", "_version", "_info_key", "_info_cache",
+        "_status", "_initialized_at", "_initialized_at_iso", "_initialized_monotonic",
+        "_shutdown_at", "_shutdown_at_iso", "_error", "_error_count",
+        "_validation_errors", "_validation_warnings",
+        "_metrics", "_trace_id", "_span_id",
+        "__weakref__",
+    )
+    
     def __init__(self, config: ADKComponentConfig):
         """Initialize with configuration."""
         self.config = config
@@ -434,11 +555,13 @@ class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, Observab
         self._version = config.version
         
         # Initialize mixins
-        self._status = ComponentStatus.DRAFT
-        self._validation_errors = []
-        self._validation_warnings = []
-        self._metrics = {}
-        self._error_count = 0
+        self._init_lifecycle()
+        self._init_validation()
+        self._init_observability()
+        
+        # get_info() snapshot and the state it was built from
+        self._info_key: Optional[tuple] = None
+        self._info_cache: Optional[Dict[str, Any]] = None
     
     @property
     def id(self) -> str:
@@ -466,7 +589,19 @@ class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, Observab
         pass
     
     def get_info(self) -> Dict[str, Any]:
-        """Get component information."""
+        """Get component information (rebuilt only when status, error or config fields change)."""
+        config = self.config
+        key = (
+            self._status, self._error, self._error_count, self._initialized_at,
+            config.enabled, config.description, config.category, id(config.tags)
+        )
+        if key != self._info_key:
+            self._info_cache = self._build_info()
+            self._info_key = key
+        return self._info_cache.copy()
+    
+    def _build_info(self) -> Dict[str, Any]:
+        """Build the get_info() dictionary."""
         return {
             "id": self._id,
             "name": self._name,
@@ -477,7 +612,7 @@ class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, Observab
             "description": self.config.description,
             "tags": self.config.tags,
             "category": self.config.category,
-            "initialized_at": self._initialized_at.isoformat() if self._initialized_at else None,
+            "initialized_at": self._initialized_at_iso,
             "error": self._error,
             "error_count": self._error_count
         }
@@ -487,12 +622,12 @@ class ADKComponent(ABC, LifecycleMixin, ValidationMixin, SecurityMixin, Observab
         return {
             "id": self._id,
             "status": self._status.value,
-            "healthy": self._status in (ComponentStatus.READY, ComponentStatus.ACTIVE),
+            "healthy": self._status in _READY_STATUSES,
             "error": self._error,
             "error_count": self._error_count,
             "uptime_seconds": (
-                (datetime.now(timezone.utc) - self._initialized_at).total_seconds()
-                if self._initialized_at else 0
+                time.monotonic() - self._initialized_monotonic
+                if self._initialized_monotonic is not None else 0
             )
         }
     
@@ -516,17 +651,22 @@ class ComponentRegistry:
     for all component types.
     """
     
+    __slots__ = ("_components", "_component_classes", "_by_type", "_by_type_cache", "_hooks")
+    
     def __init__(self):
         self._components: Dict[str, ADKComponent] = {}
         self._component_classes: Dict[str, Type[ADKComponent]] = {}
-        self._by_type: Dict[ComponentType, Set[str]] = {t: set() for t in ComponentType}
-        self._hooks: Dict[str, List[Callable]] = {
-            "pre_register": [],
-            "post_register": [],
-            "pre_initialize": [],
-            "post_initialize": [],
-            "pre_shutdown": [],
-            "post_shutdown": [],
+        self._by_type: DefaultDict[ComponentType, Set[str]] = defaultdict(set, {t: set() for t in _COMPONENT_TYPES})
+        # Materialized get_by_type results, dropped whenever a type's membership changes
+        self._by_type_cache: Dict[ComponentType, List[ADKComponent]] = {}
+        # Tuples, replaced (not mutated) by add_hook; dispatch skips empty ones
+        self._hooks: Dict[str, Tuple[Callable, ...]] = {
+            "pre_register": (),
+            "post_register": (),
+            "pre_initialize": (),
+            "post_initialize": (),
+            "pre_shutdown": (),
+            "post_shutdown": (),
         }
     
     def register_class(self, component_class: Type[ADKComponent], name: Optional[str] = None):
@@ -537,19 +677,29 @@ class ComponentRegistry:
     
     def register(self, component: ADKComponent) -> bool:
         """Register a component instance."""
-        for hook in self._hooks["pre_register"]:
-            hook(component)
+        hooks = self._hooks["pre_register"]
+        if hooks:
+            for hook in hooks:
+                hook(component)
         
-        if component.id in self._components:
+        replaced = self._components.get(component.id)
+        if replaced is not None:
             logger.warning(f"Component {component.id} already registered, replacing")
+            replaced_type = ComponentType(replaced.component_type)
+            self._by_type[replaced_type].discard(component.id)
+            self._by_type_cache.pop(replaced_type, None)
         
+        component_type = ComponentType(component.component_type)
         self._components[component.id] = component
-        self._by_type[component.component_type].add(component.id)
+        self._by_type[component_type].add(component.id)
+        self._by_type_cache.pop(component_type, None)
         
-        for hook in self._hooks["post_register"]:
-            hook(component)
+        hooks = self._hooks["post_register"]
+        if hooks:
+            for hook in hooks:
+                hook(component)
         
-        logger.info(f"Registered component: {component.id} ({component.component_type.value})")
+        logger.info(f"Registered component: {component.id} ({component_type.value})")
         return True
     
     def unregister(self, component_id: str) -> bool:
@@ -558,7 +708,9 @@ class ComponentRegistry:
             return False
         
         component = self._components[component_id]
-        self._by_type[component.component_type].discard(component_id)
+        component_type = ComponentType(component.component_type)
+        self._by_type[component_type].discard(component_id)
+        self._by_type_cache.pop(component_type, None)
         del self._components[component_id]
         
         logger.info(f"Unregistered component: {component_id}")
@@ -570,20 +722,25 @@ class ComponentRegistry:
     
     def get_by_type(self, component_type: ComponentType) -> List[ADKComponent]:
         """Get all components of a specific type."""
-        return [
-            self._components[cid] 
-            for cid in self._by_type.get(component_type, set())
-            if cid in self._components
-        ]
-    
-    def list_all(self) -> Dict[str, ADKComponent]:
-        """List all registered components."""
-        return self._components.copy()
+        # str-enum members hash and compare like their values, so "agent" finds AGENT
+        cached = self._by_type_cache.get(component_type)
+        if cached is None:
+            ids = self._by_type.get(component_type)
+            if not ids:
+                return []
+            cached = [self._components[cid] for cid in ids]
+            self._by_type_cache[component_type] = cached
+        return cached.copy()
+    
+    def list_all(self) -> Mapping[str, ADKComponent]:
+        """List all registered components (read-only live view)."""
+        return MappingProxyType(self._components)
     
     def list_ids(self, component_type: Optional[ComponentType] = None) -> List[str]:
         """List component IDs, optionally filtered by type."""
         if component_type:
-            return list(self._by_type.get(component_type, set()))
+            ids = self._by_type.get(component_type)
+            return list(ids) if ids else []
         return list(self._components.keys())
     
     def create(
@@ -604,10 +761,38 @@ class ComponentRegistry:
         
         return component
     
-    async def initialize_all(self, component_type: Optional[ComponentType] = None):
-        """Initialize all registered components."""
-        for hook in self._hooks["pre_initialize"]:
-            hook()
+    @staticmethod
+    async def _run_all(
+        components: List[ADKComponent],
+        action: Callable[[ADKComponent], Any],
+        concurrency: int = 1
+    ) -> List[Any]:
+        """Run a lifecycle coroutine on every component (in order for 1, else concurrently; 0 = unbounded)."""
+        if concurrency == 1:
+            return [await action(c) for c in components]
+        if concurrency > 0:
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def _bounded(component: ADKComponent):
+                async with semaphore:
+                    return await action(component)
+            
+            coros = [_bounded(c) for c in components]
+        else:
+            coros = [action(c) for c in components]
+        
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        for component, result in zip(components, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Lifecycle error in component {component.id}: {result}")
+        return results
+    
+    async def initialize_all(self, component_type: Optional[ComponentType] = None, concurrency: int = 1):
+        """Initialize all registered components (in registration order unless concurrency != 1)."""
+        hooks = self._hooks["pre_initialize"]
+        if hooks:
+            for hook in hooks:
+                hook()
         
         components = (
             self.get_by_type(component_type)
@@ -615,16 +800,19 @@ class ComponentRegistry:
             else list(self._components.values())
         )
         
-        for component in components:
-            await component.initialize()
+        await self._run_all(components, lambda c: c.initialize(), concurrency)
         
-        for hook in self._hooks["post_initialize"]:
-            hook()
-    
-    async def shutdown_all(self, component_type: Optional[ComponentType] = None):
-        """Shutdown all registered components."""
-        for hook in self._hooks["pre_shutdown"]:
-            hook()
+        hooks = self._hooks["post_initialize"]
+        if hooks:
+            for hook in hooks:
+                hook()
+    
+    async def shutdown_all(self, component_type: Optional[ComponentType] = None, concurrency: int = 1):
+        """Shutdown all registered components (in registration order unless concurrency != 1)."""
+        hooks = self._hooks["pre_shutdown"]
+        if hooks:
+            for hook in hooks:
+                hook()
         
         components = (
             self.get_by_type(component_type)
@@ -632,16 +820,17 @@ class ComponentRegistry:
             else list(self._components.values())
         )
         
-        for component in components:
-            await component.shutdown()
+        await self._run_all(components, lambda c: c.shutdown(), concurrency)
         
-        for hook in self._hooks["post_shutdown"]:
-            hook()
+        hooks = self._hooks["post_shutdown"]
+        if hooks:
+            for hook in hooks:
+                hook()
     
     def add_hook(self, event: str, callback: Callable):
         """Add a lifecycle hook."""
         if event in self._hooks:
-            self._hooks[event].append(callback)
+            self._hooks[event] += (callback,)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get registry statistics."""
@@ -658,13 +847,10 @@ class ComponentRegistry:
         }
 
 
-# Global registry instance
-_global_registry: Optional[ComponentRegistry] = None
+# Global registry instance (cheap to build, so created at import)
+_global_registry: ComponentRegistry = ComponentRegistry()
 
 
 def get_component_registry() -> ComponentRegistry:
     """Get the global component registry."""
-    global _global_registry
-    if _global_registry is None:
-        _global_registry = ComponentRegistry()
     return _global_registry
@@ -1,11 +1,17 @@
 """
 Main FastAPI application for the Agent Development Kit (ADK).
 """
+import json
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from .config import get_settings, ensure_directories
 from .api import agents_router, tools_router, mcp_servers_router, graphs_router, adapters_router, telemetry_router, repository_router
@@ -28,6 +34,32 @@ for logger_name in ['app', 'app.services', 'app.api']:
 logger = logging.getLogger(__name__)
 
 
+def _json_body(content: dict) -> bytes:
+    """Serialize a static response body once, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content).encode()
+
+
+# Static bodies for the root and health endpoints, serialized once at import
+_ROOT_BODY = _json_body({
+    "service": "Agent Development Kit (ADK)",
+    "version": "0.1.0",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "endpoints": {
+        "agents": "/agents",
+        "tools": "/tools",
+        "mcp_servers": "/mcp-servers",
+        "graphs": "/graphs",
+        "adapters": "/adapters",
+        "telemetry": "/telemetry",
+        "repository": "/repository"
+    }
+})
+_HEALTH_BODY = _json_body({"status": "healthy", "service": "adk"})
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -115,27 +147,13 @@ app.include_router(repository_router)
 @app.get("/", tags=["Health"])
 async def root():
     """Root endpoint with API information."""
-    return {
-        "service": "Agent Development Kit (ADK)",
-        "version": "0.1.0",
-        "docs": "/docs",
-        "redoc": "/redoc",
-        "endpoints": {
-            "agents": "/agents",
-            "tools": "/tools",
-            "mcp_servers": "/mcp-servers",
-            "graphs": "/graphs",
-            "adapters": "/adapters",
-            "telemetry": "/telemetry",
-            "repository": "/repository"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "adk"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/config", tags=["Health"])
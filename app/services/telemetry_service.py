@@ -2,6 +2,7 @@
 OpenTelemetry service for agent action logging.
 """
 import logging
+import os
 import uuid
 import asyncio
 from typing import Optional, List, Dict, Any
@@ -67,7 +68,7 @@ class TelemetryService:
     
     def generate_span_id(self) -> str:
         """Generate a new span ID."""
-        return uuid.uuid4().hex[:16]
+        return os.urandom(8).hex()
     
     def start_trace(
         self,
@@ -0,0 +1,127 @@
+"""
+Guardrails tests.
+"""
+import pytest
+
+from app.capabilities import guardrails
+from app.capabilities.guardrails import (
+    GuardrailAction, GuardrailConfig, GuardrailsManager, KeywordMatcher, PatternSet, PIIType
+)
+
+
+@pytest.fixture(params=["fallback", "ahocorasick"])
+def keyword_backend(request, monkeypatch):
+    """Run keyword tests with substring checks and, when installed, Aho-Corasick."""
+    if request.param == "fallback":
+        monkeypatch.setattr(guardrails, "ahocorasick", None)
+    elif guardrails.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    return request.param
+
+
+@pytest.fixture(params=["fallback", "hyperscan"])
+def pattern_backend(request, monkeypatch):
+    """Run pattern tests with plain re and, when installed, Hyperscan."""
+    if request.param == "fallback":
+        monkeypatch.setattr(guardrails, "hyperscan", None)
+    elif guardrails.hyperscan is None:
+        pytest.skip("hyperscan is not installed")
+    return request.param
+
+
+@pytest.fixture(params=["fallback", "re2"])
+def pii_backend(request, monkeypatch):
+    """Run PII tests with plain re and, when installed, RE2."""
+    if request.param == "fallback":
+        monkeypatch.setattr(guardrails, "re2", None)
+    elif guardrails.re2 is None:
+        pytest.skip("google-re2 is not installed")
+    return request.param
+
+
+class TestKeywordMatcher:
+    """Tests for blocked keyword matching."""
+    
+    def test_first_occurrence_per_keyword(self, keyword_backend):
+        """Test each matched keyword is reported once at its first position."""
+        matcher = KeywordMatcher(["bad", "worse", "absent"])
+        content = "bad, worse and bad again"
+        assert sorted(matcher.find(content)) == [("bad", 0, 3), ("worse", 5, 10)]
+    
+    def test_case_variants_share_a_key(self, keyword_backend):
+        """Test keywords differing only in case are all reported with their own spelling."""
+        matcher = KeywordMatcher(["Bad", "bad", ""])
+        assert sorted(matcher.find("not bad")) == [("Bad", 4, 7), ("bad", 4, 7)]
+    
+    def test_overlapping_keywords(self, keyword_backend):
+        """Test keywords that overlap or contain each other are all found."""
+        matcher = KeywordMatcher(["she", "he", "hers"])
+        assert sorted(matcher.find("ushers")) == [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)]
+    
+    def test_empty(self, keyword_backend):
+        """Test a matcher without keywords is falsy and finds nothing."""
+        matcher = KeywordMatcher(["", ""])
+        assert not matcher
+        assert matcher.find("anything") == []
+
+
+class TestPatternSet:
+    """Tests for blocked and rule pattern matching."""
+    
+    def test_matches_in_configuration_order(self, pattern_backend):
+        """Test found patterns keep their configured order and owners."""
+        patterns = PatternSet([(None, r"secret\d+"), (0, r"foo+"), (1, r"absent"), (None, r"zap")])
+        found = [(owner, pattern) for owner, pattern, _ in patterns.matched("ZAP foo SECRET12 fooo")]
+        assert found == [(None, r"secret\d+"), (0, r"foo+"), (None, "zap")]
+    
+    def test_rule_patterns_get_every_match(self, pattern_backend):
+        """Test rule patterns report all matches and blocked patterns only the first."""
+        patterns = PatternSet([(None, r"ab"), (3, r"ab")])
+        (_, _, blocked), (_, _, rule) = patterns.matched("ab ab AB")
+        assert [m.start() for m in blocked] == [0]
+        assert [m.start() for m in rule] == [0, 3, 6]
+    
+    def test_invalid_pattern_skipped(self, pattern_backend):
+        """Test patterns that do not compile are dropped."""
+        patterns = PatternSet([(None, r"(unclosed"), (None, r"ok")])
+        assert [pattern for _, pattern, _ in patterns.matched("ok")] == ["ok"]
+        assert not PatternSet([(None, r"[")])
+    
+    def test_unsupported_pattern_falls_back_to_re(self, pattern_backend):
+        """Test a pattern set with a back reference still matches via re."""
+        patterns = PatternSet([(None, r"(\w)\1"), (0, r"x")])
+        assert patterns._database is None
+        assert [pattern for _, pattern, _ in patterns.matched("book x")] == [r"(\w)\1", "x"]
+
+
+class TestPIIDetection:
+    """Tests for the combined PII pattern."""
+    
+    async def test_masks_each_type(self, pii_backend):
+        """Test every enabled PII type is detected and masked in one pass."""
+        manager = GuardrailsManager(GuardrailConfig())
+        result = await manager.check_input("Mail a.b@example.com or call 555-123-4567, SSN 123-45-6789")
+        assert result.content == "Mail [EMAIL_REDACTED] or call [PHONE_REDACTED], SSN [SSN_REDACTED]"
+        assert [v.details["pii_type"] for v in result.violations] == ["email", "phone", "ssn"]
+        assert [(v.start_pos, v.end_pos) for v in result.violations][0] == (5, 20)
+    
+    async def test_only_enabled_types(self, pii_backend):
+        """Test disabled PII types are left alone."""
+        manager = GuardrailsManager(GuardrailConfig(pii_types=[PIIType.EMAIL, PIIType.EMAIL]))
+        result = await manager.check_input("a.b@example.com 123-45-6789")
+        assert result.content == "[EMAIL_REDACTED] 123-45-6789"
+        assert len(result.violations) == 1
+    
+    async def test_case_insensitive(self, pii_backend):
+        """Test PII matching ignores case."""
+        manager = GuardrailsManager(GuardrailConfig(pii_types=[PIIType.EMAIL]))
+        result = await manager.check_input("A.B@EXAMPLE.COM")
+        assert result.content == "[EMAIL_REDACTED]"
+    
+    async def test_detect_without_masking(self, pii_backend):
+        """Test non-masking actions record violations but keep the content."""
+        manager = GuardrailsManager(GuardrailConfig(pii_action=GuardrailAction.BLOCK))
+        result = await manager.check_input("ssn 123-45-6789")
+        assert result.content == "ssn 123-45-6789"
+        assert result.blocked
+        assert result.violations[0].matched_text == "[hidden]"
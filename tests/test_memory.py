@@ -0,0 +1,111 @@
+"""
+Memory capability tests.
+"""
+import numpy as np
+import pytest
+
+from app.capabilities.memory import EmbeddingIndex
+
+
+class TestEmbeddingIndex:
+    """Tests for the embedding matrix used by semantic search."""
+    
+    def test_search_orders_by_cosine_similarity(self):
+        """Test results are ordered by similarity and limited."""
+        index = EmbeddingIndex()
+        index.add("x", [1.0, 0.0, 0.0])
+        index.add("xy", [1.0, 1.0, 0.0])
+        index.add("y", [0.0, 2.0, 0.0])
+        assert index.search([1.0, 0.1, 0.0]) == ["x", "xy", "y"]
+        assert index.search([0.0, 1.0, 0.0], limit=2) == ["y", "xy"]
+        assert index.search([0.0, 1.0, 0.0], candidate_ids=["x", "xy"]) == ["xy", "x"]
+    
+    def test_replace_and_remove(self):
+        """Test re-adding replaces a row and removed rows are never returned."""
+        index = EmbeddingIndex()
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("a", [0.0, 1.0])
+        assert len(index) == 2
+        index.remove("b")
+        assert "b" not in index
+        assert index.search([0.0, 1.0]) == ["a"]
+    
+    def test_mismatched_dimension_skipped(self):
+        """Test embeddings of another dimension are not added."""
+        index = EmbeddingIndex()
+        index.add("a", [1.0, 0.0])
+        index.add("b", [1.0, 0.0, 0.0])
+        assert "b" not in index
+    
+    def test_compaction_reclaims_dead_rows(self):
+        """Test rows are compacted once more than half are dead."""
+        index = EmbeddingIndex()
+        count = EmbeddingIndex.CHUNK_ROWS + 10
+        for i in range(count):
+            index.add(f"m{i}", [1.0, float(i)])
+        assert index._matrix.shape[0] == 2 * EmbeddingIndex.CHUNK_ROWS
+        
+        for i in range(count // 2 + 1):
+            index.remove(f"m{i}")
+        assert len(index._ids) == len(index) == count - (count // 2 + 1)
+        assert index._matrix.shape[0] == EmbeddingIndex.CHUNK_ROWS
+        assert index._rows == {mid: row for row, mid in enumerate(index._ids)}
+        assert index.search([0.0, 1.0], limit=1) == [f"m{count - 1}"]
+        
+        for mid in list(index._rows):
+            index.remove(mid)
+        assert len(index) == 0
+        assert index.nbytes == 0
+        assert index.search([0.0, 1.0]) == []
+
+
+class TestEmbeddingIndexInt8:
+    """Tests for int8-quantized embedding rows."""
+    
+    def test_rejects_unknown_quantization(self):
+        """Test only none and int8 are accepted."""
+        with pytest.raises(ValueError):
+            EmbeddingIndex(quantization="int4")
+    
+    def test_rows_stored_as_int8_with_scales(self):
+        """Test rows are int8 with a per-row scale, a quarter the size of float32 rows."""
+        index = EmbeddingIndex(quantization="int8")
+        full = EmbeddingIndex()
+        for i in range(10):
+            index.add(f"m{i}", [1.0, float(i), -2.0])
+            full.add(f"m{i}", [1.0, float(i), -2.0])
+        assert index._matrix.dtype == np.int8
+        assert index._scales.dtype == np.float32
+        assert index._matrix.nbytes == full._matrix.nbytes // 4
+        assert index.nbytes == index._matrix.nbytes + index._scales.nbytes
+        assert int(np.abs(index._matrix[:10]).max(axis=1).min()) == 127
+    
+    def test_scores_close_to_float32(self):
+        """Test quantized rankings and scores match float32 closely."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 32)).tolist()
+        index = EmbeddingIndex(quantization="int8")
+        full = EmbeddingIndex()
+        for i, vector in enumerate(vectors):
+            index.add(f"m{i}", vector)
+            full.add(f"m{i}", vector)
+        
+        query = EmbeddingIndex.normalize(vectors[7])
+        quantized = index._score(slice(0, 200), query)
+        exact = full._score(slice(0, 200), query)
+        assert np.abs(quantized - exact).max() < 0.02
+        assert index.search(vectors[7], limit=1) == ["m7"]
+        assert index.search(vectors[7], limit=5) == full.search(vectors[7], limit=5)
+    
+    def test_compaction_keeps_scales(self):
+        """Test compaction moves each row's scale along with it."""
+        index = EmbeddingIndex(quantization="int8")
+        for i in range(10):
+            index.add(f"m{i}", [float(i + 1), 1.0])
+        for i in range(6):
+            index.remove(f"m{i}")
+        assert index._ids == ["m6", "m7", "m8", "m9"]
+        for row, i in enumerate(range(6, 10)):
+            assert index._scales[row] == pytest.approx(float(EmbeddingIndex.normalize([i + 1, 1.0]).max()) / 127)
+        assert index.search([1.0, 0.0], limit=1) == ["m9"]
@@ -0,0 +1,38 @@
+"""
+Model router tests.
+"""
+from collections import Counter
+
+from app.capabilities.model_router import WeightedScheduler
+
+
+class TestWeightedScheduler:
+    """Tests for interleaved weighted round robin."""
+    
+    def test_turns_follow_weights(self):
+        """Test each endpoint gets its weight's share of every cycle."""
+        scheduler = WeightedScheduler({"a": 3, "b": 2, "c": 1})
+        picks = [scheduler.pick({"a", "b", "c"}) for _ in range(60)]
+        assert Counter(picks) == {"a": 30, "b": 20, "c": 10}
+    
+    def test_turns_are_interleaved(self):
+        """Test a heavy endpoint's turns are spread across the cycle."""
+        scheduler = WeightedScheduler({"a": 2, "b": 2, "c": 1})
+        assert [scheduler.pick({"a", "b", "c"}) for _ in range(5)] == ["a", "b", "c", "a", "b"]
+        
+        scheduler = WeightedScheduler({"a": 3, "b": 1})
+        picks = [scheduler.pick({"a", "b"}) for _ in range(40)]
+        assert picks[:4] == ["a", "b", "a", "a"]
+        assert all(Counter(picks[i:i + 4]) == {"a": 3, "b": 1} for i in range(0, 40, 4))
+    
+    def test_weights_reduced_by_gcd(self):
+        """Test proportional weights give the same short cycle."""
+        scheduler = WeightedScheduler({"a": 200, "b": 100})
+        assert scheduler._cycle_length == 3
+        assert Counter(scheduler.pick({"a", "b"}) for _ in range(3)) == {"a": 2, "b": 1}
+    
+    def test_skips_non_candidates(self):
+        """Test only candidates are returned and unknown sets give None."""
+        scheduler = WeightedScheduler({"a": 5, "b": 1})
+        assert [scheduler.pick({"b"}) for _ in range(3)] == ["b"] * 3
+        assert scheduler.pick({"unknown"}) is None
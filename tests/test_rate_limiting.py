@@ -0,0 +1,230 @@
+"""
+Rate limiting window tests.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.capabilities import rate_limiting
+from app.capabilities.rate_limiting import FixedWindow, NumpySlidingWindow, RedisWindow
+
+
+class FakeClock:
+    """Manually advanced clock standing in for time.monotonic/time.time."""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakePipeline:
+    """Queues commands and runs them against a FakeRedis on execute."""
+    
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    def __getattr__(self, name: str):
+        return lambda *args: self.commands.append((name, args))
+    
+    async def execute(self):
+        self.redis.round_trips += 1
+        if self.redis.fail:
+            raise ConnectionError("redis unavailable")
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """In-memory stand-in for the async Redis client commands RedisWindow uses."""
+    
+    def __init__(self):
+        self.sorted_sets = {}
+        self.counters = {}
+        self.round_trips = 0
+        self.fail = False
+    
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+    
+    def zremrangebyscore(self, key, low, high):
+        members = self.sorted_sets.setdefault(key, {})
+        for member in [m for m, score in members.items() if low <= score <= high]:
+            del members[member]
+    
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+    
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+    
+    def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+    
+    def expire(self, key, seconds):
+        return True
+    
+    async def zrem(self, key, member):
+        self.round_trips += 1
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the clock seen by the rate limiting module."""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiting, "time", SimpleNamespace(monotonic=fake, time=fake))
+    return fake
+
+
+class TestNumpySlidingWindow:
+    """Tests for the numpy-backed exact sliding window."""
+    
+    async def test_limit_and_growth(self, clock):
+        """Test the buffer grows from its initial size and the limit holds."""
+        window = NumpySlidingWindow(window_seconds=10, max_requests=100)
+        assert len(window._buffer) == NumpySlidingWindow.INITIAL_SIZE
+        
+        results = [await window.record() for _ in range(101)]
+        assert results == [True] * 100 + [False]
+        assert window.get_count() == 100
+        assert window.get_remaining() == 0
+        assert len(window._buffer) == 128
+    
+    async def test_compacts_instead_of_growing(self, clock):
+        """Test expired requests are compacted away when the buffer end is reached."""
+        window = NumpySlidingWindow(window_seconds=10, max_requests=100)
+        for _ in range(NumpySlidingWindow.INITIAL_SIZE):
+            assert await window.record()
+        
+        clock.advance(11)
+        assert await window.record()
+        assert len(window._buffer) == NumpySlidingWindow.INITIAL_SIZE
+        assert (window._head, window._tail) == (0, 1)
+        assert window.get_count() == 1
+    
+    async def test_buffer_bounded_under_churn(self, clock):
+        """Test the buffer never exceeds twice the limit while requests expire."""
+        window = NumpySlidingWindow(window_seconds=10, max_requests=40)
+        for _ in range(1000):
+            clock.advance(0.3)
+            assert await window.record()
+            assert window.get_count() <= 40
+            assert len(window._buffer) <= 80
+    
+    async def test_reset_time(self, clock):
+        """Test the reset time follows the oldest live request."""
+        window = NumpySlidingWindow(window_seconds=10, max_requests=5)
+        assert window.get_reset_time() == 0
+        await window.record()
+        clock.advance(4)
+        await window.record()
+        assert window.get_reset_time() == pytest.approx(6)
+        clock.advance(7)
+        assert window.get_count() == 1
+        assert window.get_reset_time() == pytest.approx(3)
+
+
+class TestFixedWindow:
+    """Tests for the fixed window counter and its weighted estimate."""
+    
+    async def test_unweighted_resets_each_window(self, clock):
+        """Test an unweighted window allows a full quota right after rolling over."""
+        window = FixedWindow(window_seconds=10, max_requests=10)
+        assert [await window.record() for _ in range(11)] == [True] * 10 + [False]
+        
+        clock.advance(15)
+        assert window.get_count() == 0
+        assert [await window.record() for _ in range(11)] == [True] * 10 + [False]
+        assert window.get_reset_time() == pytest.approx(5)
+    
+    async def test_weighted_blends_previous_window(self, clock):
+        """Test the previous window counts in proportion to its remaining overlap."""
+        window = FixedWindow(window_seconds=10, max_requests=10, weighted=True)
+        for _ in range(10):
+            assert await window.record()
+        
+        # Halfway into the next window half of the previous count still applies
+        clock.advance(15)
+        assert window.get_count() == 5
+        assert [await window.record() for _ in range(6)] == [True] * 5 + [False]
+        
+        clock.advance(4)
+        assert window._estimate(clock.now) == pytest.approx(5 + 1)
+    
+    async def test_weighted_forgets_after_idle_window(self, clock):
+        """Test a skipped window drops the previous count entirely."""
+        window = FixedWindow(window_seconds=10, max_requests=10, weighted=True)
+        for _ in range(10):
+            await window.record()
+        
+        clock.advance(25)
+        assert window.previous_count == 0
+        assert window.get_count() == 0
+
+
+class TestRedisWindow:
+    """Tests for the Redis-backed shared window."""
+    
+    async def test_sliding_rejects_without_counting(self, clock):
+        """Test rejected requests are removed from the sorted set."""
+        redis = FakeRedis()
+        window = RedisWindow(redis, "rl:user", window_seconds=10, max_requests=2)
+        assert [await window.record() for _ in range(2)] == [True, True]
+        assert not await window.record()
+        assert redis.zcard("rl:user") == 2
+        assert window.get_count() == 2
+        assert window.get_remaining() == 0
+        
+        clock.advance(11)
+        assert await window.record()
+        assert window.get_count() == 1
+        assert window.get_reset_time() == pytest.approx(10)
+    
+    async def test_rejection_cached_locally(self, clock):
+        """Test a rejected key skips Redis until the local cache expires."""
+        redis = FakeRedis()
+        window = RedisWindow(redis, "rl:user", window_seconds=10, max_requests=1, local_cache_seconds=0.5)
+        assert await window.record()
+        assert not await window.record()
+        round_trips = redis.round_trips
+        
+        assert not await window.record()
+        assert redis.round_trips == round_trips
+        
+        clock.advance(1)
+        assert not await window.record()
+        assert redis.round_trips > round_trips
+    
+    async def test_fixed_window_counts_per_window_key(self, clock):
+        """Test fixed windows count with INCR on a key per window."""
+        redis = FakeRedis()
+        window = RedisWindow(redis, "rl:agent", window_seconds=10, max_requests=2, sliding=False)
+        assert [await window.record() for _ in range(3)] == [True, True, False]
+        assert window.get_count() == 2
+        
+        clock.advance(10)
+        assert await window.record()
+        assert len(redis.counters) == 2
+    
+    async def test_fails_open(self, clock, monkeypatch):
+        """Test Redis errors allow the request and are logged once per interval."""
+        monkeypatch.setattr(RedisWindow, "_last_warning", 0.0)
+        monkeypatch.setattr(RedisWindow, "_suppressed_warnings", 0)
+        redis = FakeRedis()
+        redis.fail = True
+        window = RedisWindow(redis, "rl:user", window_seconds=10, max_requests=1)
+        assert await window.record()
+        assert await window.record()
+        assert RedisWindow._suppressed_warnings == 1
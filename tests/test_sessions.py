@@ -0,0 +1,102 @@
+"""
+Session manager tests.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.capabilities import sessions
+from app.capabilities.sessions import SessionConfig, SessionManager, SessionStatus
+
+
+class FakeClock:
+    """Manually advanced stand-in for time.time."""
+    
+    def __init__(self, now: float = 1_800_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the clock seen by the sessions module."""
+    fake = FakeClock()
+    monkeypatch.setattr(sessions, "time", SimpleNamespace(time=fake))
+    return fake
+
+
+@pytest.fixture
+def manager():
+    """Session manager with a 10 minute default TTL."""
+    return SessionManager(SessionConfig(default_ttl_minutes=10, full_sweep_every=0))
+
+
+class TestSessionExpiry:
+    """Tests for heap-driven session expiry."""
+    
+    async def test_cleanup_removes_only_due_sessions(self, clock, manager):
+        """Test cleanup pops sessions whose expiry has passed."""
+        short = await manager.create_session(user_id="u1", ttl_minutes=1)
+        long = await manager.create_session(user_id="u1")
+        
+        clock.advance(59)
+        assert await manager.cleanup_expired() == 0
+        
+        clock.advance(1)
+        assert await manager.cleanup_expired() == 1
+        assert await manager.get_session(short.id) is None
+        assert await manager.get_session(long.id) is long
+        stats = await manager.get_stats()
+        assert stats["total_sessions"] == stats["active_sessions"] == 1
+        assert manager._by_user == {"u1": {long.id}}
+    
+    async def test_extended_ttl_skips_stale_entry(self, clock, manager):
+        """Test a session whose expiry was extended survives its old heap entry."""
+        session = await manager.create_session(ttl_minutes=1)
+        new_expiry = datetime.utcfromtimestamp(clock.now + 600)
+        await manager.update_session(session.id, {"expires_at": new_expiry})
+        
+        clock.advance(120)
+        assert await manager.cleanup_expired() == 0
+        assert not session.is_expired()
+        
+        clock.advance(600)
+        assert await manager.cleanup_expired() == 1
+        assert manager._expiry_heap == []
+    
+    async def test_deleted_session_entry_ignored(self, clock, manager):
+        """Test heap entries of deleted sessions are dropped without counting."""
+        session = await manager.create_session(ttl_minutes=1)
+        await manager.delete_session(session.id)
+        
+        clock.advance(120)
+        assert await manager.cleanup_expired() == 0
+        assert manager._expiry_heap == []
+    
+    async def test_direct_expires_at_assignment(self, clock, manager):
+        """Test assigning expires_at directly resyncs the epoch used for expiry."""
+        session = await manager.create_session()
+        session.expires_at = datetime.utcfromtimestamp(clock.now) - timedelta(seconds=1)
+        assert session.is_expired()
+        assert (await manager.get_session(session.id)).status == SessionStatus.EXPIRED
+    
+    async def test_full_sweep_removes_directly_expired(self, clock):
+        """Test sessions marked EXPIRED outside the manager are swept periodically."""
+        manager = SessionManager(SessionConfig(default_ttl_minutes=10, full_sweep_every=2))
+        session = await manager.create_session()
+        kept = await manager.create_session()
+        session.status = SessionStatus.EXPIRED
+        
+        assert await manager.cleanup_expired() == 0
+        assert await manager.cleanup_expired() == 1
+        assert list(manager._sessions) == [kept.id]
+        assert (await manager.get_stats())["active_sessions"] == 1
+        
+        kept.status = SessionStatus.EXPIRED
+        assert await manager.cleanup_expired(full=True) == 1